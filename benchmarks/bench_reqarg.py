@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the per-request overhead of :func:`request_args` compared with
+fetching the same arguments from :data:`flask.request` by hand.
+
+Every case is run inside a fresh ``test_request_context`` so that parsing of
+the request is included, and the results are written as JSON::
+
+    $ python benchmarks/bench_reqarg.py --output results.json
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import platform
+import sys
+from io import BytesIO
+from timeit import default_timer
+
+import flask
+from flask import Flask, request
+from werkzeug.test import EnvironBuilder
+
+from flask_reqarg import request_args, get, post, files, cookies, collection
+
+ARG_COUNTS = (1, 5, 10, 50, 100)
+
+
+def _names(count):
+    return ['arg{0}'.format(i) for i in range(count)]
+
+
+def _accept(**kwargs):
+    return kwargs
+
+
+def _make_view(names, **spec):
+    # request_args needs the argument names in the signature
+    namespace = {'_accept': _accept}
+    exec('def view({0}):\n    return _accept({1})\n'.format(
+        ', '.join(names), ', '.join('{0}={0}'.format(name) for name in names)), namespace)
+    return request_args(**spec)(namespace['view'])
+
+
+def _source_cases(source, fetcher, raw_dict, count):
+    names = _names(count)
+    params = dict((name, 'value') for name in names)
+
+    def raw_view():
+        d = raw_dict()
+        return _accept(**dict((name, d.get(name)) for name in names))
+
+    view = _make_view(names, **dict((name, fetcher()) for name in names))
+    if source == 'get':
+        environ = {'query_string': params}
+    elif source == 'post':
+        environ = {'method': 'POST', 'data': params}
+    elif source == 'multipart':
+        environ = {'method': 'POST', 'data': params, 'content_type': 'multipart/form-data'}
+    else:
+        environ = {'headers': [('Cookie', '; '.join('{0}={1}'.format(*item) for item in params.items()))]}
+    return view, raw_view, environ
+
+
+def _cases():
+    for count in ARG_COUNTS:
+        yield ('get', count), _source_cases('get', get, lambda: request.args, count)
+        yield ('form', count), _source_cases('post', post, lambda: request.form, count)
+        yield ('multipart', count), _source_cases('multipart', post, lambda: request.form, count)
+        yield ('cookies', count), _source_cases('cookies', cookies, lambda: request.cookies, count)
+
+        names = _names(count)
+        yield ('implicit_args', count), (
+            _make_view(names),
+            lambda names=names: _accept(**dict((name, request.values.get(name)) for name in names)),
+            {'query_string': dict((name, 'value') for name in names)})
+
+        yield ('getlist', count), (
+            _make_view(['ids'], ids=get(getlist=True)),
+            lambda: _accept(ids=request.args.getlist('ids')),
+            {'query_string': {'ids': [str(i) for i in range(count)]}})
+
+    yield ('typed', 10), (
+        _make_view(_names(10), **dict((name, get(type=int, default=0)) for name in _names(10))),
+        lambda: _accept(**dict((name, request.args.get(name, 0, int)) for name in _names(10))),
+        {'query_string': dict((name, '42') for name in _names(10))})
+
+    yield ('files', 1), (
+        _make_view(['upload'], upload=files()),
+        lambda: _accept(upload=request.files.get('upload')),
+        {'method': 'POST', 'data': {'upload': (BytesIO(b'x' * 1024), 'upload.bin')}})
+
+    def raw_nested():
+        form = request.form
+        inner = dict((name, form.get(name)) for name in ('c', 'd'))
+        outer = dict((name, form.get(name)) for name in ('a', 'b'))
+        outer['inner'] = inner
+        return _accept(item=outer)
+
+    yield ('nested_collection', 2), (
+        _make_view(['item'], item=collection('a', 'b', inner=collection('c', 'd', _source='post'),
+                                             _source='post')),
+        raw_nested,
+        {'method': 'POST', 'data': dict((name, 'value') for name in 'abcd')})
+
+
+def _time(app, view, environ_kwargs, number, repeat):
+    best = None
+    for _ in range(repeat):
+        environs = []
+        for _ in range(number):
+            kwargs = dict(environ_kwargs)
+            data = kwargs.get('data')
+            if isinstance(data, dict):
+                # file streams can only be read once
+                kwargs['data'] = dict(
+                    (key, (BytesIO(value[0].getvalue()), value[1]) if isinstance(value, tuple) else value)
+                    for key, value in data.items())
+            environs.append(EnvironBuilder(**kwargs).get_environ())
+
+        start = default_timer()
+        for environ in environs:
+            with app.request_context(environ):
+                view()
+        elapsed = default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / number
+
+
+def _flask_version():
+    try:
+        from importlib.metadata import version
+    except ImportError:
+        return getattr(flask, '__version__', None)
+    return version('flask')
+
+
+def run(number, repeat, select=None):
+    app = Flask(__name__)
+    results = []
+    for (scenario, count), (view, raw_view, environ) in _cases():
+        if select and scenario not in select:
+            continue
+        reqarg_time = _time(app, view, environ, number, repeat)
+        raw_time = _time(app, raw_view, environ, number, repeat)
+        results.append({
+            'scenario': scenario,
+            'args': count,
+            'reqarg_us': reqarg_time * 1e6,
+            'raw_us': raw_time * 1e6,
+            'overhead_us': (reqarg_time - raw_time) * 1e6,
+            'ratio': reqarg_time / raw_time,
+        })
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'flask': _flask_version(),
+        'number': number,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--number', type=int, default=1000,
+                        help='requests per timing run (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='timing runs per case; the fastest is reported (default: %(default)s)')
+    parser.add_argument('-s', '--scenario', action='append',
+                        help='only run the given scenario (may be repeated)')
+    parser.add_argument('-o', '--output', help='write the JSON results to this file')
+    opts = parser.parse_args(argv)
+
+    report = run(opts.number, opts.repeat, opts.scenario)
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Load-tests views decorated with :func:`request_args` under concurrency.
+
+A threaded WSGI server is started on a local port, and each scenario is
+driven by a number of client threads sending requests over keep-alive
+connections. Throughput and latency percentiles are written as JSON::
+
+    $ python benchmarks/load_reqarg.py --concurrency 8 --output load.json
+
+The clients run in the same process as the server, so the numbers include
+their share of the interpreter; compare results taken on the same machine.
+"""
+
+from __future__ import division, print_function
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import threading
+from timeit import default_timer
+
+from flask import Flask
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from flask_reqarg import request_args, get, post, files, collection
+
+try:
+    from http.client import HTTPConnection
+    from urllib.parse import urlencode
+except ImportError:
+    from httplib import HTTPConnection
+    from urllib import urlencode
+
+WIDE_FIELDS = 50
+BOUNDARY = 'reqarg-load-boundary'
+
+
+def _names(prefix, count):
+    return ['{0}{1}'.format(prefix, i) for i in range(count)]
+
+
+def create_app():
+    app = Flask(__name__)
+
+    @app.route('/query')
+    @request_args(q=get(), page=get(type=int, default=1), size=get(type=int, default=20),
+                  ids=get(getlist=True, type=int))
+    def query(q, page, size, ids):
+        return '{0}:{1}:{2}:{3}'.format(q, page, size, len(ids))
+
+    @app.route('/form', methods=['POST'])
+    @request_args(title=post(), body=post(), tags=post(getlist=True), draft=post(type=int, default=0))
+    def form(title, body, tags, draft):
+        return '{0}:{1}:{2}:{3}'.format(len(title or ''), len(body or ''), len(tags), draft)
+
+    @app.route('/multipart', methods=['POST'])
+    @request_args(upload=files(), name=post())
+    def multipart(upload, name):
+        return '{0}:{1}'.format(name, len(upload.read()) if upload else 0)
+
+    @app.route('/collection')
+    @request_args(item=collection(*_names('f', WIDE_FIELDS), _source='get'))
+    def wide_collection(item):
+        return str(sum(1 for value in item.values() if value is not None))
+
+    return app
+
+
+def _multipart_body(fields, file_name, file_data):
+    lines = []
+    for name, value in fields:
+        lines.append('--{0}\r\nContent-Disposition: form-data; name="{1}"\r\n\r\n{2}\r\n'.format(
+            BOUNDARY, name, value).encode('latin-1'))
+    lines.append('--{0}\r\nContent-Disposition: form-data; name="upload"; filename="{1}"\r\n'
+                 'Content-Type: application/octet-stream\r\n\r\n'.format(BOUNDARY, file_name).encode('latin-1'))
+    lines.append(file_data)
+    lines.append('\r\n--{0}--\r\n'.format(BOUNDARY).encode('latin-1'))
+    return b''.join(lines)
+
+
+def scenarios(upload_size):
+    # (method, path, body, headers) of the request sent by each scenario
+    query = urlencode([('q', 'flask'), ('page', '3'), ('size', '50')] + [('ids', str(i)) for i in range(20)])
+    form = urlencode([('title', 'Hello'), ('body', 'x' * 512), ('draft', '1')] +
+                     [('tags', 'tag{0}'.format(i)) for i in range(10)]).encode('ascii')
+    wide = urlencode([(name, 'value') for name in _names('f', WIDE_FIELDS)])
+    return {
+        'query': ('GET', '/query?' + query, None, {}),
+        'form': ('POST', '/form', form, {'Content-Type': 'application/x-www-form-urlencoded'}),
+        'multipart': ('POST', '/multipart', _multipart_body([('name', 'upload')], 'upload.bin', b'x' * upload_size),
+                      {'Content-Type': 'multipart/form-data; boundary=' + BOUNDARY}),
+        'collection': ('GET', '/collection?' + wide, None, {}),
+    }
+
+
+class _KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class _GCPauses(object):
+    # total time spent in garbage collections while a scenario runs
+    def __init__(self):
+        self.collections = 0
+        self.seconds = 0.0
+        self._started = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self._started = default_timer()
+        elif self._started is not None:
+            self.collections += 1
+            self.seconds += default_timer() - self._started
+            self._started = None
+
+    def __enter__(self):
+        if hasattr(gc, 'callbacks'):
+            gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        if hasattr(gc, 'callbacks'):
+            gc.callbacks.remove(self)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _client(port, request, count, latencies, errors):
+    method, path, body, headers = request
+    connection = HTTPConnection('127.0.0.1', port)
+    try:
+        for _ in range(count):
+            started = default_timer()
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except Exception:
+                connection.close()
+                connection = HTTPConnection('127.0.0.1', port)
+                ok = False
+            elapsed = default_timer() - started
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors.append(elapsed)
+    finally:
+        connection.close()
+
+
+def _drive(port, request, requests, concurrency):
+    counts = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    latencies = []
+    errors = []
+    threads = [threading.Thread(target=_client, args=(port, request, count, latencies, errors))
+               for count in counts]
+    started = default_timer()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return default_timer() - started, sorted(latencies), errors
+
+
+def run(requests, concurrency, warmup, upload_size, select=None):
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True, request_handler=_KeepAliveHandler)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    results = []
+    try:
+        for scenario, request in sorted(scenarios(upload_size).items()):
+            if select and scenario not in select:
+                continue
+            if warmup:
+                _drive(server.port, request, warmup, concurrency)
+            with _GCPauses() as pauses:
+                elapsed, latencies, errors = _drive(server.port, request, requests, concurrency)
+            results.append({
+                'scenario': scenario,
+                'requests': len(latencies),
+                'errors': len(errors),
+                'seconds': elapsed,
+                'throughput_rps': len(latencies) / elapsed,
+                'mean_ms': sum(latencies) / len(latencies) * 1e3 if latencies else None,
+                'p50_ms': _ms(_percentile(latencies, 0.5)),
+                'p99_ms': _ms(_percentile(latencies, 0.99)),
+                'p999_ms': _ms(_percentile(latencies, 0.999)),
+                'max_ms': _ms(latencies[-1] if latencies else None),
+                'gc_collections': pauses.collections,
+                'gc_pause_ms': pauses.seconds * 1e3,
+            })
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'requests': requests,
+        'concurrency': concurrency,
+        'warmup': warmup,
+        'upload_size': upload_size,
+        'results': results,
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--requests', type=int, default=2000,
+                        help='requests per scenario (default: %(default)s)')
+    parser.add_argument('-c', '--concurrency', type=int, default=8,
+                        help='concurrent client connections (default: %(default)s)')
+    parser.add_argument('-w', '--warmup', type=int, default=200,
+                        help='untimed requests sent before each scenario (default: %(default)s)')
+    parser.add_argument('--upload-size', type=int, default=64 * 1024,
+                        help='size of the file sent by the multipart scenario (default: %(default)s)')
+    parser.add_argument('-s', '--scenario', action='append',
+                        help='only run the given scenario (may be repeated)')
+    parser.add_argument('-o', '--output', help='write the JSON results to this file')
+    opts = parser.parse_args(argv)
+
+    report = run(opts.requests, opts.concurrency, opts.warmup, opts.upload_size, opts.scenario)
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
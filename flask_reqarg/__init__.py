@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from flask import request
+from flask import current_app, request, request_tearing_down
 
 from .base import *
+from .base import _PlainDict, _set_max_content_length
+from .cache import *
+from .instrument import *
+from .jsonbody import IncrementalJSON, JSONDict
+from .offload import *
+from .schema import *
+from .streaming import MultipartDecoder, MultipartReader
+from .wsgi import *
 
 __all__ = (
     'request_args',
@@ -11,7 +19,30 @@ __all__ = (
     'args',
     'files',
     'cookies',
-    'collection'
+    'json',
+    'fetch',
+    'raw',
+    'msgpack',
+    'collection',
+    'register_source',
+    'SOURCE_COST_CHEAP',
+    'SOURCE_COST_PARSE',
+    'SOURCE_COST_BODY',
+    'LazyArgument',
+    'LimitExceeded',
+    'cached',
+    'CacheBackend',
+    'LRUCache',
+    'Instrument',
+    'StatsCollector',
+    'add_instrument',
+    'remove_instrument',
+    'set_executor',
+    'shutdown_executors',
+    'Field',
+    'Schema',
+    'ValidationError',
+    'WSGIRequestWrapper'
 )
 
 
@@ -37,6 +68,31 @@ class _FlaskRequestWrapper(RequestWrapperBase):
     def files_dict(self):
         return self._request.files
 
+    @property
+    def json_dict(self):
+        # the parsed body is kept in the environ, so every decorated function
+        # called during the request shares it
+        environ = self._request.environ
+        result = environ.get('reqarg.json')
+        if result is None:
+            if current_app.config.get('REQARG_INCREMENTAL_JSON'):
+                try:
+                    text = self._request.get_data(cache=True).decode('utf-8') if self._request.is_json else None
+                except UnicodeDecodeError:
+                    # like get_json(silent=True), invalid bodies are ignored
+                    text = None
+                result = JSONDict() if text is None else IncrementalJSON(text)
+            else:
+                data = self._request.get_json(silent=True)
+                result = JSONDict(data) if isinstance(data, dict) else JSONDict()
+            environ['reqarg.json'] = result
+        return result
+
+    @property
+    def raw_body(self):
+        # Werkzeug keeps the body it read, so the view doesn't copy it again
+        return memoryview(self._request.get_data(cache=True))
+
     def from_get(self, name, default, type):
         return self._request.args.get(name, default, type)
 
@@ -52,9 +108,45 @@ class _FlaskRequestWrapper(RequestWrapperBase):
     def from_files(self, name):
         return self._request.files.get(name)
 
+    def stream_file(self, name):
+        request = self._request
+        if (MultipartDecoder is None or request.mimetype != 'multipart/form-data' or
+                'form' in request.__dict__):
+            # the body has already been consumed (or can't be decoded
+            # incrementally), so fall back to the parsed uploads
+            return super(_FlaskRequestWrapper, self).stream_file(name)
+
+        reader = self._request.environ.get('reqarg.multipart_reader')
+        if reader is None:
+            boundary = request.mimetype_params['boundary'].encode('latin-1')
+            reader = MultipartReader(request.stream, boundary)
+            request.environ['reqarg.multipart_reader'] = reader
+        return reader.iter_part(name)
+
+    @property
+    def content_length(self):
+        return self._request.content_length
+
+    def limit_content_length(self, limit):
+        super(_FlaskRequestWrapper, self).limit_content_length(limit)
+        # Werkzeug stops reading (chunked) bodies past the limit while parsing
+        _set_max_content_length(self._request, limit)
+
     @classmethod
     def create(cls, *args, **kwargs):
-        return cls(request)
+        return cls.shared(request.environ, request._get_current_object())
+
+
+def _release_wrappers(sender, **extra):
+    request.environ.pop('reqarg.wrappers', None)
+
+
+request_tearing_down.connect(_release_wrappers)
 
+_FlaskRequestWrapper.register_source('headers', lambda wrapper: wrapper.request.headers)
+_FlaskRequestWrapper.register_source(
+    'view_args', lambda wrapper: _PlainDict(wrapper.request.view_args or {}))
+_FlaskRequestWrapper.register_source('environ', lambda wrapper: _PlainDict(wrapper.request.environ))
 
 request_args = _FlaskRequestWrapper.request_args
+register_source = _FlaskRequestWrapper.register_source
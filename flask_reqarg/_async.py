@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+# kept apart from base, since this module can only be imported on Python 3.5+
+
+import asyncio
+from concurrent.futures import Future
+from functools import wraps
+from inspect import isawaitable
+from threading import Lock
+
+from .cache import _missing, key_values, make_result_key
+
+
+async def resolve_sources(request, sources):
+    for source in sources:
+        result = request.storage_dict(source)
+        if isawaitable(result):
+            request._storage_dicts[source] = await result
+
+
+class AsyncSingleFlight(object):
+    # like SingleFlight, but for coroutines; the shared result is published
+    # through a thread-safe future, so calls running in different event loops
+    # (as async views do under Flask) are coalesced as well
+    def __init__(self):
+        self._lock = Lock()
+        self._futures = {}
+
+    async def call(self, key, func):
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await func()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[key]
+
+
+def result_caller(func, cache=None, flight=None):
+    async def call(values, excluded=()):
+        key = make_result_key(func, key_values(values, excluded))
+        if key is None:
+            return await func(**values)
+
+        if cache is not None:
+            result = cache.get(key, _missing)
+            if result is not _missing:
+                return result
+
+        async def compute():
+            result = await func(**values)
+            if cache is not None:
+                cache.set(key, result)
+            return result
+
+        if flight is not None:
+            return await flight.call(key, compute)
+        return await compute()
+    return call
+
+
+def wrap_coroutine_function(cls, func, plan, cache=None, coalesce=False, lazy=False):
+    call = None
+    if cache is not None or coalesce:
+        call = result_caller(func, cache, AsyncSingleFlight() if coalesce else None)
+
+    if lazy:
+        if cls.async_sources:
+            raise TypeError('arguments from awaitable sources can not be lazy')
+
+        @wraps(func)
+        async def wrapper(*func_args, **func_kwargs):
+            request = cls.create(*func_args, **func_kwargs)
+            return await func(**plan.lazy_values(request, func_args, func_kwargs))
+        wrapper.extraction_plan = plan
+        return wrapper
+
+    @wraps(func)
+    async def wrapper(*func_args, **func_kwargs):
+        request = cls.create(*func_args, **func_kwargs)
+        values = plan.bind(func_args, func_kwargs)
+        if cls.async_sources:
+            plan.check_limits(request)
+            await resolve_sources(request, plan.sources_needed(values))
+        plan.fill(request, values)
+        if call is None:
+            return await func(**values)
+        return await call(values, plan.unkeyed_names(func_args))
+    wrapper.extraction_plan = plan
+    return wrapper
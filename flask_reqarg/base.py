@@ -2,102 +2,1101 @@
 
 from sys import version_info
 from abc import ABCMeta, abstractproperty
+from array import array as _array
+from collections import namedtuple
 from functools import wraps
-from inspect import isfunction, getargspec
+from mmap import mmap as _mmap, ACCESS_READ
+from operator import attrgetter
+from inspect import isfunction
+from weakref import WeakKeyDictionary
+from timeit import default_timer
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from .cache import result_caller
+from .coalesce import SingleFlight
+from .instrument import _instruments
+from .offload import check_executor, get_executor
 
 if version_info[0] == 2:
     from itertools import izip as zip
 
+try:
+    import msgpack as _msgpack
+except ImportError:
+    _msgpack = None
+
+try:
+    from inspect import Parameter, signature
+except ImportError:
+    from inspect import getargspec
+    signature = None
+
+try:
+    from typing import Any, Union
+except ImportError:
+    Any = Union = None
+
+try:
+    from inspect import iscoroutinefunction
+except ImportError:
+    def iscoroutinefunction(func):
+        return False
+else:
+    from ._async import wrap_coroutine_function
+
 __all__ = (
     'get',
     'post',
     'args',
     'files',
     'cookies',
+    'json',
+    'fetch',
+    'raw',
+    'msgpack',
     'collection',
-    'RequestWrapperBase'
+    'RequestWrapperBase',
+    'LazyArgument',
+    'LimitExceeded',
+    'SOURCE_COST_CHEAP',
+    'SOURCE_COST_PARSE',
+    'SOURCE_COST_BODY'
 )
 
+# the declared costs of resolving request sources, so that extraction can
+# visit the cheap ones first
+SOURCE_COST_CHEAP = 0
+SOURCE_COST_PARSE = 1
+SOURCE_COST_BODY = 2
+
 
 def _extract_opt_source(kwargs):
-    result = kwargs.pop('_source', 'args')
-    if result not in ('post', 'get', 'args', 'files', 'cookies'):
-        result = 'args'
-    return result
+    return kwargs.pop('_source', 'args')
+
+
+def _check_source(wrapper_type, source):
+    if source not in wrapper_type._source_registry:
+        raise TypeError('unknown request source {0!r}'.format(source))
 
 
 def _extract_opt_storage_type(kwargs):
     return kwargs.pop('_storage', dict)
 
 
-def _fetch_from_dict(d, name, default, type):
-    result = d.get(name, default)
+_missing = object()
+
+
+def _convert(value, default, type, on_error=None):
+    if value is _missing:
+        return default
+    if type is not None:
+        try:
+            value = type(value)
+        except (ValueError, TypeError) as e:
+            if on_error is not None:
+                on_error(value, e)
+            value = default
+    return value
+
+
+_ARRAY_TYPECODES = {int: 'q', float: 'd'}
+
+
+def _convert_list(values, type, typecode, on_error=None):
+    # the whole list is converted at once; only if that fails are the values
+    # converted one by one, dropping the invalid ones like Werkzeug does
     if type is not None:
         try:
-            result = type(result)
-        except ValueError:
-            result = default
+            values = list(map(type, values))
+        except (ValueError, TypeError):
+            converted = []
+            for value in values:
+                try:
+                    converted.append(type(value))
+                except (ValueError, TypeError) as e:
+                    if on_error is not None:
+                        on_error(value, e)
+            values = converted
+
+    if typecode is not None:
+        try:
+            values = _array(typecode, values)
+        except (OverflowError, TypeError):
+            result = _array(typecode)
+            for value in values:
+                try:
+                    result.append(value)
+                except (OverflowError, TypeError) as e:
+                    if on_error is not None:
+                        on_error(value, e)
+            values = result
+    return values
+
+
+def _array_typecode(array, type, getlist):
+    if not array:
+        return None
+    if not getlist:
+        raise TypeError('only lists can be fetched as arrays')
+    if array is True:
+        if type not in _ARRAY_TYPECODES:
+            raise TypeError('the array typecode for {0!r} must be given explicitly'.format(type))
+        return _ARRAY_TYPECODES[type]
+    return array
+
+
+def _convert_memoized(conversions, memo_key, value, default, type, on_error=None):
+    # converted values are kept for the whole request (keyed by source, name
+    # and type), so a value read by several decorated functions is converted
+    # only once; failures are memoized too, but each fetcher keeps its default
+    if value is _missing or type is None:
+        return default if value is _missing else value
+    try:
+        result = conversions[memo_key]
+    except KeyError:
+        result = conversions[memo_key] = _convert(value, _missing, type, on_error)
+    except TypeError:
+        # unhashable converters can't be memoized
+        result = _convert(value, _missing, type, on_error)
+    return default if result is _missing else result
+
+
+def _bind_error_handler(on_error, arg_name):
+    if on_error is None:
+        return None
+
+    def handler(value, error):
+        on_error(arg_name, value, error)
+    return handler
+
+
+def _fetch_from_dict(d, name, default, type):
+    return _convert(d.get(name, _missing), default, type)
+
+
+class _PlainDict(dict):
+    # gives plain dicts the getlist() of multi-value dicts
+    def getlist(self, key):
+        value = self.get(key, _missing)
+        if value is _missing:
+            return []
+        return value if isinstance(value, list) else [value]
+
+
+# fetchers only describe where an argument comes from; they are compiled into
+# extraction steps once, when the decorator is applied
+class _Fetcher(object):
+    def sources(self):
+        return frozenset()
+
+    def compile(self, wrapper_type, arg_name, on_error=None):
+        raise NotImplementedError
+
+    def __call__(self, request, arg_name):
+        return self.compile(type(request), arg_name)(request)
+
+
+class LimitExceeded(RequestEntityTooLarge):
+    pass
+
+
+def _set_max_content_length(request, limit):
+    # older Flask/Werkzeug versions only read the limit from the app config
+    try:
+        current = request.max_content_length
+        if current is None or current > limit:
+            request.max_content_length = limit
+    except AttributeError:
+        pass
+
+
+def _file_size(file):
+    stream = file.stream
+    position = stream.tell()
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+def _map_file(file):
+    # a read-only view of an uploaded file: small parts kept in memory are
+    # viewed directly, while the ones spooled to disk are memory-mapped
+    stream = getattr(file, 'stream', file)
+    if getattr(stream, '_rolled', True) is False:
+        # fileno() of a spooled file would write it to disk first
+        stream = stream._file
+    if hasattr(stream, 'getvalue'):
+        return memoryview(stream.getvalue())
+
+    try:
+        fileno = stream.fileno()
+    except (AttributeError, EnvironmentError, ValueError):
+        stream.seek(0)
+        return memoryview(stream.read())
+    stream.flush()
+    try:
+        return memoryview(_mmap(fileno, 0, access=ACCESS_READ))
+    except ValueError:
+        # empty files can't be mapped
+        return memoryview(b'')
+
+
+# limits are checked against the raw values, before anything is converted
+def _make_limit_check(arg_name, max_len=None, max_items=None, max_bytes=None):
+    if max_len is None and max_bytes is None:
+        check_value = None
+    else:
+        def check_value(value):
+            if max_len is not None and hasattr(value, '__len__') and len(value) > max_len:
+                raise LimitExceeded('argument {0!r} is longer than {1}'.format(arg_name, max_len))
+            if max_bytes is not None and hasattr(value, 'stream') and _file_size(value) > max_bytes:
+                raise LimitExceeded('file {0!r} is larger than {1} bytes'.format(arg_name, max_bytes))
+
+    if max_items is None and check_value is None:
+        return None
+
+    def check(value, getlist=False):
+        if value is _missing:
+            return
+        if getlist:
+            if max_items is not None and len(value) > max_items:
+                raise LimitExceeded('argument {0!r} has more than {1} items'.format(arg_name, max_items))
+            if check_value is not None:
+                for item in value:
+                    check_value(item)
+        elif check_value is not None:
+            check_value(value)
+    return check
+
+
+class _ValueFetcher(_Fetcher):
+    def __init__(self, source, name=None, default=None, type=None, getlist=False, array=None,
+                 max_len=None, max_items=None, max_bytes=None):
+        self.source = source
+        self.name = name
+        self.default = default
+        self.type = type
+        self.getlist = getlist
+        self.typecode = _array_typecode(array, type, getlist)
+        self.max_len = max_len
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+    def limit_check(self, arg_name):
+        return _make_limit_check(arg_name, self.max_len, self.max_items, self.max_bytes)
+
+    def sources(self):
+        return frozenset([self.source])
+
+    def compile(self, wrapper_type, arg_name, on_error=None):
+        _check_source(wrapper_type, self.source)
+        source = self.source
+        key = self.name or arg_name
+        default = self.default
+        type = self.type
+        on_error = _bind_error_handler(on_error, arg_name)
+        check = self.limit_check(arg_name)
+
+        if self.getlist:
+            typecode = self.typecode
+            if type is None and typecode is None and check is None:
+                def extract(request):
+                    return request.storage_dict(source).getlist(key)
+            else:
+                def extract(request):
+                    values = request.storage_dict(source).getlist(key)
+                    if check is not None:
+                        check(values, True)
+                    if type is None and typecode is None:
+                        return values
+                    return _convert_list(values, type, typecode, on_error)
+        else:
+            memo_key = (source, key, type)
+
+            def extract(request):
+                value = request.storage_dict(source).get(key, _missing)
+                if check is not None:
+                    check(value)
+                return _convert_memoized(request.conversions, memo_key, value, default, type, on_error)
+        return extract
+
+
+class _CollectionFetcher(_Fetcher):
+    def __init__(self, names, fetchers, source, storage_type):
+        self.names = names
+        self.fetchers = fetchers
+        self.source = source
+        self.storage_type = storage_type
+
+    def sources(self):
+        result = frozenset([self.source] if self.names else [])
+        return result.union(*[_fetcher_sources(fetcher) for fetcher in self.fetchers.values()])
+
+    def compile(self, wrapper_type, arg_name, on_error=None):
+        if self.names:
+            _check_source(wrapper_type, self.source)
+        if on_error is not None:
+            on_error = _prefix_error_handler(on_error, arg_name)
+        if self.storage_type == 'record':
+            return self._compile_record(wrapper_type, arg_name, on_error)
+
+        steps = _compile_steps(
+            wrapper_type,
+            [(name, _ValueFetcher(self.source)) for name in self.names] +
+            list(self.fetchers.items()), on_error)
+        storage_type = self.storage_type
+
+        def extract(request):
+            values = {}
+            for step in steps:
+                step(request, values)
+            return storage_type(**values)
+        return extract
+
+    def _compile_record(self, wrapper_type, arg_name, on_error):
+        # values are fetched in field order and passed positionally to a
+        # record type generated for this collection
+        source = self.source
+        names = tuple(self.names)
+        items = list(self.fetchers.items())
+        record_type = _make_record_type(arg_name, names + tuple(name for name, _ in items))
+        extracts = tuple(
+            _compile_fetcher(wrapper_type, fetcher, name, on_error) for name, fetcher in items)
+
+        def extract(request):
+            values = request.from_source_many(source, names) if names else []
+            values.extend([extract_value(request) for extract_value in extracts])
+            return record_type._make(values)
+        return extract
+
+
+class _FileStreamFetcher(_Fetcher):
+    def __init__(self, name=None, max_bytes=None):
+        self.source = 'files'
+        self.name = name
+        self.max_bytes = max_bytes
+
+    def sources(self):
+        return frozenset(['files'])
+
+    def compile(self, wrapper_type, arg_name, on_error=None):
+        key = self.name or arg_name
+        max_bytes = self.max_bytes
+        if max_bytes is None:
+            def extract(request):
+                return request.stream_file(key)
+        else:
+            def extract(request):
+                return _limit_stream(request.stream_file(key), arg_name, max_bytes)
+        return extract
+
+
+def _limit_stream(chunks, arg_name, max_bytes):
+    # the upload is rejected as soon as it grows too large, while it is still
+    # being read from the client
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise LimitExceeded('file {0!r} is larger than {1} bytes'.format(arg_name, max_bytes))
+        yield chunk
+
+
+class _OffloadedFetcher(_Fetcher):
+    # the conversion (or processing of uploaded files) runs in an executor;
+    # within an extraction plan the arguments are submitted as soon as their
+    # sources are resolved, and awaited together after all other steps
+    def __init__(self, fetcher, executor=None, process=None):
+        executor = executor or 'thread'
+        check_executor(executor)
+        self.fetcher = fetcher
+        self.source = fetcher.source
+        self.executor = executor
+        self.process = process
+
+    def sources(self):
+        return self.fetcher.sources()
+
+    def compile(self, wrapper_type, arg_name, on_error=None):
+        submit = self.compile_submit(wrapper_type, arg_name, on_error)
+
+        def extract(request):
+            return submit(request)()
+        return extract
+
+    def compile_submit(self, wrapper_type, arg_name, on_error=None):
+        fetcher = self.fetcher
+        _check_source(wrapper_type, fetcher.source)
+        source = fetcher.source
+        key = fetcher.name or arg_name
+        default = fetcher.default
+        executor = self.executor
+        check = fetcher.limit_check(arg_name)
+        on_error = _bind_error_handler(on_error, arg_name)
+
+        process = self.process
+        func = fetcher.type if process is None else process
+
+        def submit_file(file):
+            # uploaded files can't be sent to other processes, so their
+            # content is read before it is submitted
+            return get_executor(executor).submit(process, file.read())
+
+        if fetcher.getlist:
+            typecode = fetcher.typecode
+
+            def submit(request):
+                values = request.storage_dict(source).getlist(key)
+                if check is not None:
+                    check(values, True)
+                if process is not None:
+                    futures = [(value, submit_file(value)) for value in values]
+
+                    def wait():
+                        results = []
+                        for value, future in futures:
+                            try:
+                                results.append(future.result())
+                            except (ValueError, TypeError) as e:
+                                if on_error is not None:
+                                    on_error(value, e)
+                        return results
+                    return wait
+                if func is None and typecode is None:
+                    return lambda: values
+                future = get_executor(executor).submit(_convert_list, values, func, typecode)
+                return future.result
+            return submit
+
+        def submit(request):
+            value = request.storage_dict(source).get(key, _missing)
+            if check is not None:
+                check(value)
+            if value is _missing or value is None or func is None:
+                result = default if value is _missing else value
+                return lambda: result
+            if process is not None:
+                future = submit_file(value)
+            else:
+                future = get_executor(executor).submit(func, value)
+
+            def wait():
+                try:
+                    return future.result()
+                except (ValueError, TypeError) as e:
+                    if on_error is not None:
+                        on_error(value, e)
+                    return default
+            return wait
+        return submit
+
+
+class _RawFetcher(_Fetcher):
+    source = 'raw'
+
+    def sources(self):
+        return frozenset(['raw'])
+
+    def compile(self, wrapper_type, arg_name, on_error=None):
+        _check_source(wrapper_type, 'raw')
+
+        def extract(request):
+            return request.storage_dict('raw')
+        return extract
+
+
+class _BodyLimitFetcher(_Fetcher):
+    # rejects the request before its body is read (or while it is read, if
+    # its length isn't known in advance)
+    def __init__(self, fetcher, max_bytes):
+        self.fetcher = fetcher
+        self.source = fetcher.source
+        self.max_bytes = max_bytes
+
+    def sources(self):
+        return self.fetcher.sources()
+
+    def compile(self, wrapper_type, arg_name, on_error=None):
+        extract = _compile_fetcher(wrapper_type, self.fetcher, arg_name, on_error)
+        max_bytes = self.max_bytes
+
+        def limited_extract(request):
+            request.limit_content_length(max_bytes)
+            return extract(request)
+        return limited_extract
+
+
+def _decode_msgpack(data):
+    try:
+        result = _msgpack.unpackb(data, raw=False)
+    except (ValueError, TypeError):
+        return _PlainDict()
+    return _PlainDict(result) if isinstance(result, dict) else _PlainDict()
+
+
+class _Pending(object):
+    __slots__ = ('wait',)
+
+    def __init__(self, wait):
+        self.wait = wait
+
+
+def _compile_offloaded_step(wrapper_type, arg_name, fetcher, on_error):
+    submit = fetcher.compile_submit(wrapper_type, arg_name, on_error)
+
+    def step(request, values):
+        values[arg_name] = _Pending(submit(request))
+    return step
+
+
+def _compile_gather_step(arg_names):
+    def step(request, values):
+        for arg_name in arg_names:
+            value = values[arg_name]
+            if type(value) is _Pending:
+                values[arg_name] = value.wait()
+    return step
+
+
+def _fetcher_sources(fetcher):
+    # sources read by arbitrary callables are unknown
+    return fetcher.sources() if isinstance(fetcher, _Fetcher) else frozenset()
+
+
+def _streams_files(fetcher):
+    if isinstance(fetcher, _FileStreamFetcher):
+        return True
+    if isinstance(fetcher, _CollectionFetcher):
+        return any(_streams_files(child) for child in fetcher.fetchers.values())
+    return False
+
+
+def _sources_besides_streams(fetcher):
+    if isinstance(fetcher, _FileStreamFetcher):
+        return frozenset()
+    if isinstance(fetcher, _CollectionFetcher):
+        result = frozenset([fetcher.source] if fetcher.names else [])
+        return result.union(*[_sources_besides_streams(child) for child in fetcher.fetchers.values()])
+    return _fetcher_sources(fetcher)
+
+
+def _check_streams(wrapper_type, func, fetchers):
+    # streamed files are read straight from the body, part by part, so
+    # nothing else in the same function may parse it
+    if not any(_streams_files(fetcher) for fetcher in fetchers.values()):
+        return False
+    sources = frozenset().union(*[_sources_besides_streams(fetcher) for fetcher in fetchers.values()])
+    body_sources = sorted(source for source in sources if wrapper_type.source_cost(source) >= SOURCE_COST_BODY)
+    if body_sources:
+        raise TypeError('{0}() streams files, so it can not fetch other arguments from the request body '
+                        '(sources: {1})'.format(func.__name__, ', '.join(body_sources)))
+    return True
+
+
+def _make_record_type(arg_name, field_names):
+    try:
+        return namedtuple(arg_name, field_names)
+    except ValueError as e:
+        raise TypeError('can not create record for argument {0!r}: {1}'.format(arg_name, e))
+
+
+def _prefix_error_handler(on_error, prefix):
+    def handler(arg_name, value, error):
+        on_error('{0}.{1}'.format(prefix, arg_name), value, error)
+    return handler
+
+
+def _compile_fetcher(wrapper_type, fetcher, arg_name, on_error=None):
+    if isinstance(fetcher, _Fetcher):
+        return fetcher.compile(wrapper_type, arg_name, on_error)
+    if not callable(fetcher):
+        raise TypeError('fetcher for argument {0!r} is not callable'.format(arg_name))
+
+    def extract(request):
+        return fetcher(request, arg_name)
+    return extract
+
+
+def _compile_single_step(wrapper_type, arg_name, fetcher, on_error):
+    extract = _compile_fetcher(wrapper_type, fetcher, arg_name, on_error)
+
+    def step(request, values):
+        values[arg_name] = extract(request)
+    return step
+
+
+def _limit_checks(items):
+    checks = [(index, fetcher.limit_check(arg_name)) for index, (arg_name, fetcher) in enumerate(items)]
+    return tuple((index, check) for index, check in checks if check is not None)
+
+
+def _compile_bulk_step(source, items, on_error):
+    keys = tuple(fetcher.name or arg_name for arg_name, fetcher in items)
+    targets = tuple(
+        (arg_name, (source, key, fetcher.type), fetcher.default, fetcher.type,
+         _bind_error_handler(on_error, arg_name))
+        for key, (arg_name, fetcher) in zip(keys, items))
+    checks = _limit_checks(items)
+
+    def step(request, values):
+        raw_values = request.from_source_many(source, keys, _missing)
+        for index, check in checks:
+            check(raw_values[index])
+        conversions = request.conversions
+        for (arg_name, memo_key, default, type, on_error), value in zip(targets, raw_values):
+            values[arg_name] = _convert_memoized(conversions, memo_key, value, default, type,
+                                                 on_error)
+    return step
+
+
+def _compile_bulk_list_step(source, items, on_error):
+    keys = tuple(fetcher.name or arg_name for arg_name, fetcher in items)
+    arg_names = tuple(arg_name for arg_name, fetcher in items)
+    checks = _limit_checks(items)
+
+    if all(fetcher.type is None and fetcher.typecode is None for _, fetcher in items):
+        def step(request, values):
+            raw_lists = request.lists_from_source_many(source, keys)
+            for index, check in checks:
+                check(raw_lists[index], True)
+            values.update(zip(arg_names, raw_lists))
+        return step
+
+    targets = tuple(
+        (arg_name, fetcher.type, fetcher.typecode, _bind_error_handler(on_error, arg_name))
+        for arg_name, fetcher in items)
+
+    def step(request, values):
+        raw_lists = request.lists_from_source_many(source, keys)
+        for index, check in checks:
+            check(raw_lists[index], True)
+        for (arg_name, type, typecode, on_error), raw_list in zip(targets, raw_lists):
+            values[arg_name] = _convert_list(raw_list, type, typecode, on_error)
+    return step
+
+
+def _compile_steps(wrapper_type, items, on_error=None):
+    # plain value fetchers reading the same source are merged into a single
+    # bulk step, so each source is visited only once per request; steps are
+    # ordered by the cost of the sources they read, cheapest first
+    steps = []
+    groups = {}
+    offloaded = []
+    for arg_name, fetcher in items:
+        if type(fetcher) is _ValueFetcher:
+            groups.setdefault((fetcher.source, fetcher.getlist), []).append((arg_name, fetcher))
+        elif type(fetcher) is _OffloadedFetcher:
+            _check_source(wrapper_type, fetcher.source)
+            offloaded.append(arg_name)
+            steps.append((wrapper_type.source_cost(fetcher.source),
+                          _compile_offloaded_step(wrapper_type, arg_name, fetcher, on_error)))
+        else:
+            cost = max([wrapper_type.source_cost(source) for source in _fetcher_sources(fetcher)] or
+                       [SOURCE_COST_BODY])
+            steps.append((cost, _compile_single_step(wrapper_type, arg_name, fetcher, on_error)))
+
+    for (source, getlist), group in groups.items():
+        _check_source(wrapper_type, source)
+        if getlist:
+            step = _compile_bulk_list_step(source, group, on_error)
+        else:
+            step = _compile_bulk_step(source, group, on_error)
+        steps.append((wrapper_type.source_cost(source), step))
+
+    steps.sort(key=lambda item: item[0])
+    if offloaded:
+        steps.append((None, _compile_gather_step(tuple(offloaded))))
+    return tuple(step for _, step in steps)
+
+
+_empty = object()
+_parameters_cache = WeakKeyDictionary()
+
+
+def _unwrap(func):
+    while getattr(func, '__wrapped__', None) is not None:
+        func = func.__wrapped__
+    return func
+
+
+def _resolve_annotation(annotation, func_globals):
+    # string annotations (quoted or postponed by `from __future__ import
+    # annotations`) are evaluated one by one, so that the annotations which
+    # can't be resolved at runtime (forward references, TYPE_CHECKING
+    # imports) are ignored without losing the others
+    if annotation is Parameter.empty:
+        return _empty
+    if isinstance(annotation, str):
+        try:
+            return eval(annotation, func_globals)
+        except Exception:
+            return _empty
+    return annotation
+
+
+def _parameters(func):
+    # (name, default, annotation) of the arguments which can be passed by
+    # name, inspected once per function
+    try:
+        return _parameters_cache[func]
+    except (KeyError, TypeError):
+        pass
+
+    if signature is None:
+        names, _, _, defaults = getargspec(func)
+        defaults = (_empty,) * (len(names) - len(defaults or ())) + tuple(defaults or ())
+        result = tuple((name, default, _empty) for name, default in zip(names, defaults))
+    else:
+        func_globals = getattr(_unwrap(func), '__globals__', {})
+        result = tuple(
+            (param.name,
+             _empty if param.default is Parameter.empty else param.default,
+             _resolve_annotation(param.annotation, func_globals))
+            for param in signature(func).parameters.values()
+            if param.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY))
+
+    try:
+        _parameters_cache[func] = result
+    except TypeError:
+        pass
     return result
 
 
-def get(name=None, default=None, type=None, getlist=False):
-    def fetch_one(request, arg_name):
-        return request.from_get(name or arg_name, default, type)
+def _strip_optional(annotation):
+    # Optional[int] and int | None are fetched as int
+    args = getattr(annotation, '__args__', None)
+    if args and (getattr(annotation, '__origin__', None) is Union or
+                 type(annotation).__name__ == 'UnionType'):
+        args = [arg for arg in args if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+_TRUE_VALUES = frozenset(['1', 'true', 'on', 'yes'])
+_FALSE_VALUES = frozenset(['0', 'false', 'off', 'no', ''])
+
+
+def _parse_bool(value):
+    # bool('false') is True, so flags are parsed from their usual spellings
+    value = value.strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise ValueError('invalid boolean {0!r}'.format(value))
+
+
+def _annotation_type(annotation):
+    if annotation in (_empty, str, object, Any) or not callable(annotation):
+        return None
+    if annotation is bool:
+        return _parse_bool
+    if getattr(annotation, '__origin__', None) is not None:
+        # generic aliases (other than lists) can't convert values
+        return None
+    return annotation
+
+
+def _annotation_fetcher(source, default, annotation):
+    annotation = _strip_optional(annotation)
+    if annotation is list or getattr(annotation, '__origin__', None) is list:
+        item_types = getattr(annotation, '__args__', None) or (_empty,)
+        return _ValueFetcher(source, type=_annotation_type(item_types[0]), getlist=True)
+    return _ValueFetcher(source, default=None if default is _empty else default,
+                         type=_annotation_type(annotation))
+
+
+class LazyArgument(object):
+    __slots__ = ('_extract', '_request', '_value')
+
+    def __init__(self, extract, request):
+        self._extract = extract
+        self._request = request
+        self._value = None
+
+    @classmethod
+    def resolved(cls, value):
+        result = cls(None, None)
+        result._value = value
+        return result
+
+    def __call__(self):
+        if self._extract is not None:
+            self._value = self._extract(self._request)
+            self._extract = self._request = None
+        return self._value
+
+    def __repr__(self):
+        if self._extract is not None:
+            return '<LazyArgument (unresolved)>'
+        return '<LazyArgument {0!r}>'.format(self._value)
+
+
+class _ExtractionPlan(object):
+    __slots__ = ('wrapper_type', 'func', 'arg_names', 'fetchers', 'source', 'sources', 'steps', 'fallback_names',
+                 'implicit_fetchers', 'implicit_steps', 'plain_names', 'max_content_length', 'streams_files',
+                 'passed_names',
+                 '_argument_steps')
 
-    def fetch_all(request, arg_name):
-        return request.list_from_get(name or arg_name)
+    def __init__(self, wrapper_type, func, args, kwargs, source, max_content_length=None):
+        _check_source(wrapper_type, source)
+        parameters = _parameters(func)
+        arg_names = tuple(name for name, _, _ in parameters)
+        if len(args) > len(arg_names):
+            raise TypeError('{0}() takes {1} argument(s) but {2} fetcher(s) were given'.format(
+                func.__name__, len(arg_names), len(args)))
 
-    return fetch_all if getlist else fetch_one
+        fetchers = dict(zip(arg_names, args))
+        for arg_name, fetcher in kwargs.items():
+            if arg_name not in arg_names:
+                raise TypeError('{0}() has no argument {1!r}'.format(func.__name__, arg_name))
+            if arg_name in fetchers:
+                raise TypeError('got multiple fetchers for argument {0!r}'.format(arg_name))
+            fetchers[arg_name] = fetcher
 
+        self.func = func
+        self.arg_names = arg_names
+        self.fetchers = fetchers
+        self.source = source
+        self.sources = frozenset().union(*[_fetcher_sources(fetcher) for fetcher in fetchers.values()])
+        self.wrapper_type = wrapper_type
+        self.steps = _compile_steps(
+            wrapper_type,
+            [(arg_name, fetchers[arg_name]) for arg_name in arg_names if arg_name in fetchers])
+        self.fallback_names = tuple(
+            arg_name for arg_name in arg_names if arg_name not in fetchers)
 
-def post(name=None, default=None, type=None, getlist=False):
-    def fetch_one(request, arg_name):
-        return request.from_post(name or arg_name, default, type)
+        # arguments with annotations or defaults are fetched (and converted)
+        # as if they were given fetchers, but only if the caller doesn't pass
+        # them, e.g. as arguments of the URL rule
+        self.implicit_fetchers = dict(
+            (arg_name, _annotation_fetcher(source, default, annotation))
+            for arg_name, default, annotation in parameters
+            if arg_name not in fetchers and (default is not _empty or annotation is not _empty))
+        self.implicit_steps = _compile_steps(
+            wrapper_type,
+            [(arg_name, self.implicit_fetchers[arg_name]) for arg_name in arg_names
+             if arg_name in self.implicit_fetchers])
+        self.plain_names = tuple(
+            arg_name for arg_name in self.fallback_names if arg_name not in self.implicit_fetchers)
+        self.streams_files = _check_streams(wrapper_type, func, fetchers)
+        # the arguments without fetchers of functions streaming files can't be
+        # read from a body source, so they must be passed (e.g. by the URL
+        # rule); this is only known when the function is called
+        if self.streams_files and wrapper_type.source_cost(source) >= SOURCE_COST_BODY:
+            self.passed_names = self.fallback_names
+        else:
+            self.passed_names = ()
+        self.max_content_length = max_content_length
+        self._argument_steps = None
 
-    def fetch_all(request, arg_name):
-        return request.list_from_post(name or arg_name)
+    def _bound_names(self):
+        # the instance (or class) of a method, which is always passed
+        if self.arg_names and self.arg_names[0] in ('self', 'cls'):
+            return self.arg_names[:1]
+        return ()
 
-    return fetch_all if getlist else fetch_one
+    def unkeyed_names(self, func_args):
+        # only the instance of a method is left out of the key of cached and
+        # coalesced calls; other positional arguments are part of it
+        return self._bound_names() if func_args else ()
 
+    def check_passed(self, values):
+        missing_names = [arg_name for arg_name in self.passed_names if arg_name not in values]
+        if missing_names:
+            raise TypeError('{0}() streams files, so it can not fetch {1} from the request body (source: {2})'.format(
+                self.func.__name__, ', '.join(missing_names), self.source))
 
-def args(name=None, default=None, type=None, getlist=False):
-    def fetch_one(request, arg_name):
-        return request.from_get_or_post(name or arg_name, default, type)
+    def bind(self, func_args, func_kwargs):
+        values = dict(zip(self.arg_names, func_args))
+        values.update(func_kwargs)
+        if self.passed_names:
+            self.check_passed(values)
+        return values
 
-    def fetch_all(request, arg_name):
-        return request.list_from_get_or_post(name or arg_name)
+    def sources_needed(self, values):
+        # the uploads of functions streaming files are never parsed as a whole
+        sources = self.sources - frozenset(['files']) if self.streams_files else self.sources
+        for arg_name in self.fallback_names:
+            if arg_name not in values:
+                return sources | frozenset([self.source])
+        return sources
 
-    return fetch_all if getlist else fetch_one
+    def check_limits(self, request):
+        if self.max_content_length is not None:
+            request.limit_content_length(self.max_content_length)
 
+    def fill(self, request, values):
+        self.check_limits(request)
+        if _instruments:
+            return self._fill_instrumented(request, values)
 
-def files(name=None, getlist=False):
-    def fetch_one(request, arg_name):
-        return request.from_files(name or arg_name)
+        for step in self.steps:
+            step(request, values)
+        if self.implicit_steps and any(arg_name not in values for arg_name in self.implicit_fetchers):
+            implicit_values = {}
+            for step in self.implicit_steps:
+                step(request, implicit_values)
+            for arg_name, value in implicit_values.items():
+                values.setdefault(arg_name, value)
+        missing_names = [arg_name for arg_name in self.plain_names if arg_name not in values]
+        if missing_names:
+            values.update(zip(missing_names, request.from_source_many(self.source, missing_names)))
+        return values
 
-    def fetch_all(request, arg_name):
-        return request.list_from_files(name or arg_name)
+    def extract(self, request, func_args, func_kwargs):
+        return self.fill(request, self.bind(func_args, func_kwargs))
 
-    return fetch_all if getlist else fetch_one
+    def _compile_argument_steps(self):
+        # one step per argument (instead of bulk steps) so each of them can
+        # be timed or fetched on its own, and conversion failures are reported
+        func = self.func
 
+        def on_error(arg_name, value, error):
+            for instrument in tuple(_instruments):
+                instrument.conversion_failed(func, arg_name, value, error)
 
-def cookies(name=None, default=None, type=None):
-    def fetch(request, arg_name):
-        return request.from_cookies(name or arg_name, default, type)
-    return fetch
+        steps = []
+        for arg_name in self.arg_names:
+            if arg_name in self.fetchers:
+                fetcher = self.fetchers[arg_name]
+                steps.append((arg_name, getattr(fetcher, 'source', None), False,
+                              _compile_fetcher(self.wrapper_type, fetcher, arg_name, on_error)))
+            else:
+                fetcher = self.implicit_fetchers.get(arg_name) or _ValueFetcher(self.source)
+                steps.append((arg_name, self.source, True,
+                              fetcher.compile(self.wrapper_type, arg_name, on_error)))
+        return tuple(steps)
+
+    def argument_steps(self):
+        if self._argument_steps is None:
+            self._argument_steps = self._compile_argument_steps()
+        return self._argument_steps
+
+    def lazy_values(self, request, func_args, func_kwargs):
+        # positional arguments are passed as they are, while the others are
+        # wrapped in thunks which fetch them on first call
+        self.check_limits(request)
+        values = dict(zip(self.arg_names, func_args))
+        for arg_name, value in func_kwargs.items():
+            values[arg_name] = LazyArgument.resolved(value)
+        if self.passed_names:
+            self.check_passed(values)
+        for arg_name, source, fallback, extract in self.argument_steps():
+            if not (fallback and arg_name in values):
+                values[arg_name] = LazyArgument(extract, request)
+        return values
+
+    def _fill_instrumented(self, request, values):
+        argument_steps = self.argument_steps()
+
+        func = self.func
+        instruments = tuple(_instruments)
+        for instrument in instruments:
+            instrument.extraction_started(func)
+
+        started = default_timer()
+        for source in self.sources_needed(values):
+            resolve_started = default_timer()
+            request.storage_dict(source)
+            elapsed = default_timer() - resolve_started
+            for instrument in instruments:
+                instrument.source_resolved(func, source, elapsed)
+
+        for arg_name, source, fallback, extract in argument_steps:
+            if fallback and arg_name in values:
+                continue
+            extract_started = default_timer()
+            values[arg_name] = extract(request)
+            elapsed = default_timer() - extract_started
+            for instrument in instruments:
+                instrument.argument_extracted(func, arg_name, source, elapsed)
+
+        elapsed = default_timer() - started
+        for instrument in instruments:
+            instrument.extraction_finished(func, elapsed)
+        return values
+
+
+def get(name=None, default=None, type=None, getlist=False, array=None, max_len=None,
+        max_items=None, offload=False, executor=None):
+    return _offloaded(_ValueFetcher('get', name, default, type, getlist, array, max_len, max_items),
+                      offload, executor)
+
+
+def post(name=None, default=None, type=None, getlist=False, array=None, max_len=None,
+         max_items=None, offload=False, executor=None):
+    return _offloaded(_ValueFetcher('post', name, default, type, getlist, array, max_len, max_items),
+                       offload, executor)
+
+
+def args(name=None, default=None, type=None, getlist=False, array=None, max_len=None,
+         max_items=None, offload=False, executor=None):
+    return _offloaded(_ValueFetcher('args', name, default, type, getlist, array, max_len, max_items),
+                       offload, executor)
+
+
+def files(name=None, getlist=False, stream=False, max_bytes=None, max_items=None, process=None,
+          executor=None, mmap=False):
+    if stream:
+        if getlist or process is not None or mmap:
+            raise TypeError('streamed files can not be fetched as a list, processed or mapped')
+        return _FileStreamFetcher(name, max_bytes)
+    if mmap:
+        if process is not None:
+            raise TypeError('mapped files can not be processed')
+        return _ValueFetcher('files', name, type=_map_file, getlist=getlist, max_items=max_items,
+                             max_bytes=max_bytes)
+    fetcher = _ValueFetcher('files', name, getlist=getlist, max_items=max_items, max_bytes=max_bytes)
+    if process is None:
+        if executor is not None:
+            raise TypeError('executor is only used to process files')
+        return fetcher
+    return _OffloadedFetcher(fetcher, executor, process)
+
+
+def cookies(name=None, default=None, type=None, max_len=None):
+    return _ValueFetcher('cookies', name, default, type, max_len=max_len)
+
+
+def json(name=None, default=None, type=None, getlist=False, array=None, max_len=None,
+         max_items=None, offload=False, executor=None):
+    return _offloaded(_ValueFetcher('json', name, default, type, getlist, array, max_len, max_items),
+                       offload, executor)
+
+
+def fetch(source, name=None, default=None, type=None, getlist=False, array=None, max_len=None,
+          max_items=None, offload=False, executor=None):
+    return _offloaded(_ValueFetcher(source, name, default, type, getlist, array, max_len, max_items),
+                      offload, executor)
+
+
+def _offloaded(fetcher, offload, executor):
+    if not offload and executor is None:
+        return fetcher
+    return _OffloadedFetcher(fetcher, executor)
+
+
+def raw(max_bytes=None):
+    fetcher = _RawFetcher()
+    return fetcher if max_bytes is None else _BodyLimitFetcher(fetcher, max_bytes)
+
+
+def msgpack(name=None, default=None, type=None, getlist=False, array=None, max_len=None, max_items=None,
+            max_bytes=None):
+    if _msgpack is None:
+        raise ImportError('msgpack() requires the msgpack package')
+    fetcher = _ValueFetcher('msgpack', name, default, type, getlist, array, max_len, max_items)
+    return fetcher if max_bytes is None else _BodyLimitFetcher(fetcher, max_bytes)
 
 
 def collection(*args, **kwargs):
     source = _extract_opt_source(kwargs)
     storage_type = _extract_opt_storage_type(kwargs)
-
-    def fetch(request, arg_name):
-        values = {}
-        for arg in args:
-            values[arg] = request.from_source(source, arg)
-        for arg, arg_getter in kwargs.items():
-            values[arg] = arg_getter(request, arg)
-        return storage_type(**values)
-    return fetch
+    return _CollectionFetcher(args, kwargs, source, storage_type)
 
 
 class RequestWrapperBase(object):
@@ -105,17 +1104,35 @@ class RequestWrapperBase(object):
 
     def __init__(self, request):
         self._request = request
-        self._storage_dict_map = {
-            '_request': self._request,
-            '_get': self.get_dict,
-            '_post': self.post_dict,
-            '_args': self.args_dict,
-            '_cookies': self.cookies_dict,
-            '_files': self.files_dict
-        }
+        self._storage_dicts = {}
+        self.conversions = {}
+
+    def storage_dict(self, source):
+        # sources are resolved on first use, so the request body is never
+        # parsed unless some argument actually reads from it
+        try:
+            return self._storage_dicts[source]
+        except KeyError:
+            accessor, _ = self._source_registry[source]
+            result = accessor(self)
+            self._storage_dicts[source] = result
+            return result
 
     def from_source(self, source, name):
-        return self._storage_dict_map['_' + source].get(name)
+        return self.storage_dict(source).get(name)
+
+    def from_source_many(self, source, names, default=None):
+        storage = self.storage_dict(source)
+        get_many = getattr(storage, 'get_many', None)
+        if get_many is not None:
+            return get_many(names, default)
+
+        get = storage.get
+        return [get(name, default) for name in names]
+
+    def lists_from_source_many(self, source, names):
+        getlist = self.storage_dict(source).getlist
+        return [getlist(name) for name in names]
 
     def from_get(self, name, default, type):
         return _fetch_from_dict(self.get_dict, name, default, type)
@@ -132,6 +1149,23 @@ class RequestWrapperBase(object):
     def from_files(self, name):
         return self.files_dict.get(name)
 
+    def stream_file(self, name, chunk_size=64 * 1024):
+        file = self.storage_dict('files').get(name)
+        if file is not None:
+            for chunk in iter(lambda: file.stream.read(chunk_size), b''):
+                yield chunk
+
+    @property
+    def content_length(self):
+        return None
+
+    def limit_content_length(self, limit):
+        # rejects the request before its body is read; wrappers that parse the
+        # body themselves should also stop reading it past the limit
+        length = self.content_length
+        if length is not None and length > limit:
+            raise LimitExceeded('request body is larger than {0} bytes'.format(limit))
+
     def list_from_get(self, name):
         return self.get_dict.getlist(name)
 
@@ -144,6 +1178,10 @@ class RequestWrapperBase(object):
     def list_from_files(self, name):
         return self.files_dict.getlist(name)
 
+    # wrappers whose source dicts are awaitables (e.g. for Quart-style request
+    # objects) set this, so that async views await the sources they need
+    async_sources = False
+
     @property
     def request(self):
         return self._request
@@ -168,33 +1206,95 @@ class RequestWrapperBase(object):
     def files_dict(self):
         pass
 
+    @property
+    def json_dict(self):
+        raise NotImplementedError('{0} does not support JSON bodies'.format(type(self).__name__))
+
+    @property
+    def raw_body(self):
+        raise NotImplementedError('{0} does not support raw bodies'.format(type(self).__name__))
+
+    @property
+    def msgpack_dict(self):
+        # decoded from the (shared) raw body without copying it
+        return _decode_msgpack(self.storage_dict('raw'))
+
     @classmethod
     def create(cls, *args, **kwargs):
         pass
 
+    @classmethod
+    def shared(cls, environ, request):
+        # a single wrapper (with its resolved sources and converted values) is
+        # kept in the environ, so every decorated function called while
+        # handling the request reuses it
+        wrappers = environ.get('reqarg.wrappers')
+        if wrappers is None:
+            wrappers = environ['reqarg.wrappers'] = {}
+        try:
+            return wrappers[cls]
+        except KeyError:
+            result = wrappers[cls] = cls(request)
+            return result
+
+    # maps the name of each source to its accessor and cost; subclasses get
+    # their own copy as soon as they register a source
+    _source_registry = {}
+
+    @classmethod
+    def register_source(cls, name, accessor, cost=SOURCE_COST_CHEAP):
+        if '_source_registry' not in cls.__dict__:
+            cls._source_registry = dict(cls._source_registry)
+        cls._source_registry[name] = (accessor, cost)
+
+    @classmethod
+    def source_cost(cls, name):
+        return cls._source_registry[name][1]
+
     @classmethod
     def request_args(cls, *args, **kwargs):
         source = _extract_opt_source(kwargs)
+        cache = kwargs.pop('_cache', None)
+        coalesce = kwargs.pop('_coalesce', False)
+        max_content_length = kwargs.pop('_max_content_length', None)
+        lazy = kwargs.pop('_lazy', False)
+        if lazy and (cache is not None or coalesce):
+            raise TypeError('lazy arguments can not be cached or coalesced')
 
         def decorator(func, spec=True):
-            func_arg_names = getargspec(func)[0]
-            if spec:
-                kwargs.update(zip(func_arg_names, args))
-
-            @wraps(func)
-            def wrapper(*func_args, **func_kwargs):
-                request = cls.create(*func_args, **func_kwargs)
-
-                values = func_kwargs.copy()
-                for arg_name in func_arg_names:
-                    if arg_name in kwargs:
-                        values[arg_name] = kwargs[arg_name](request, arg_name)
-                    elif arg_name not in values:
-                        values[arg_name] = request.from_source(source, arg_name)
-                return func(**values)
+            plan = _ExtractionPlan(cls, func, args if spec else (), kwargs, source, max_content_length)
+            if iscoroutinefunction(func):
+                return wrap_coroutine_function(cls, func, plan, cache, coalesce, lazy)
+
+            if lazy:
+                @wraps(func)
+                def wrapper(*func_args, **func_kwargs):
+                    request = cls.create(*func_args, **func_kwargs)
+                    return func(**plan.lazy_values(request, func_args, func_kwargs))
+            elif cache is None and not coalesce:
+                @wraps(func)
+                def wrapper(*func_args, **func_kwargs):
+                    request = cls.create(*func_args, **func_kwargs)
+                    return func(**plan.extract(request, func_args, func_kwargs))
+            else:
+                call = result_caller(func, cache, SingleFlight() if coalesce else None)
+
+                @wraps(func)
+                def wrapper(*func_args, **func_kwargs):
+                    request = cls.create(*func_args, **func_kwargs)
+                    values = plan.extract(request, func_args, func_kwargs)
+                    return call(values, plan.unkeyed_names(func_args))
+            wrapper.extraction_plan = plan
             return wrapper
 
         if len(args) == 1 and len(kwargs) == 0 and isfunction(args[0]):
             return decorator(args[0], False)
         return decorator
 
+
+for _name, _cost in (('get', SOURCE_COST_PARSE), ('cookies', SOURCE_COST_PARSE),
+                     ('post', SOURCE_COST_BODY), ('args', SOURCE_COST_BODY),
+                     ('files', SOURCE_COST_BODY), ('json', SOURCE_COST_BODY),
+                     ('msgpack', SOURCE_COST_BODY)):
+    RequestWrapperBase.register_source(_name, attrgetter(_name + '_dict'), _cost)
+RequestWrapperBase.register_source('raw', attrgetter('raw_body'), SOURCE_COST_BODY)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from collections import namedtuple, OrderedDict
+from hashlib import sha1
+from threading import Lock
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+try:
+    _text_types = (str, unicode, bytes)
+except NameError:
+    _text_types = (str, bytes)
+
+__all__ = (
+    'cached',
+    'CacheBackend',
+    'LRUCache'
+)
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+_missing = object()
+
+
+class CacheBackend(object):
+    # the interface of the backends used to cache the results of decorated
+    # functions; keys are strings and values are whatever the function returns
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                entry = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            expires, value = entry
+            if expires is not None and expires <= monotonic():
+                self.misses += 1
+                return default
+            self._items[key] = entry
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires = None if self.ttl is None else monotonic() + self.ttl
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (expires, value)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._items))
+
+
+class _CachedConverter(object):
+    def __init__(self, type, maxsize):
+        self.type = type
+        self._cache = LRUCache(maxsize)
+
+    def __call__(self, value):
+        try:
+            result = self._cache.get(value, _missing)
+        except TypeError:
+            # unhashable values can't be memoized
+            return self.type(value)
+
+        if result is _missing:
+            result = self.type(value)
+            self._cache.set(value, result)
+        return result
+
+    def cache_info(self):
+        return self._cache.info()
+
+    def cache_clear(self):
+        self._cache.clear()
+
+
+def cached(type, maxsize=128):
+    return _CachedConverter(type, maxsize)
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _canonicalize(value):
+    if value is None or isinstance(value, (bool, int, float) + _text_types):
+        return value
+    if isinstance(value, (list, tuple, array)):
+        return tuple(_canonicalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _canonicalize(item)) for key, item in value.items()))
+    raise _Uncacheable
+
+
+def make_result_key(func, values):
+    # values other than plain data (e.g. uploaded files) make a call
+    # uncacheable, in which case None is returned
+    try:
+        items = _canonicalize(values)
+    except (_Uncacheable, TypeError):
+        return None
+    name = '{0}.{1}'.format(func.__module__, getattr(func, '__qualname__', func.__name__))
+    return sha1(repr((name, items)).encode('utf-8')).hexdigest()
+
+
+def key_values(values, excluded):
+    # the instance of cached methods is left out of the key
+    if not excluded:
+        return values
+    return dict((name, value) for name, value in values.items() if name not in excluded)
+
+
+def result_caller(func, cache=None, flight=None):
+    # calls func with the cache and/or single-flight coalescing applied, both
+    # keyed on the canonicalized arguments
+    def call(values, excluded=()):
+        key = make_result_key(func, key_values(values, excluded))
+        if key is None:
+            return func(**values)
+
+        if cache is not None:
+            result = cache.get(key, _missing)
+            if result is not _missing:
+                return result
+
+        def compute():
+            result = func(**values)
+            if cache is not None:
+                cache.set(key, result)
+            return result
+
+        if flight is not None:
+            return flight.call(key, compute)
+        return compute()
+    return call
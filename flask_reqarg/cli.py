@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+import json
+from timeit import default_timer
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .base import (SOURCE_COST_BODY, _BodyLimitFetcher, _CollectionFetcher, _FileStreamFetcher,
+                   _OffloadedFetcher, _RawFetcher, _ValueFetcher, _map_file, _parse_bool)
+from .schema import Schema
+
+__all__ = (
+    'reqarg',
+)
+
+_VIEW_METHODS = ('dispatch_request', 'get', 'post', 'put', 'patch', 'delete', 'head', 'options')
+
+
+def _type_name(type):
+    if type is None:
+        return None
+    if type is _map_file:
+        return 'mmap'
+    if type is _parse_bool:
+        return 'bool'
+    return getattr(type, '__name__', None) or repr(type)
+
+
+def describe_fetcher(fetcher, arg_name):
+    if isinstance(fetcher, _BodyLimitFetcher):
+        return describe_fetcher(fetcher.fetcher, arg_name)
+    if isinstance(fetcher, _RawFetcher):
+        return {'name': arg_name, 'source': 'raw', 'type': 'memoryview', 'getlist': False}
+    if isinstance(fetcher, _OffloadedFetcher):
+        result = describe_fetcher(fetcher.fetcher, arg_name)
+        result['offload'] = fetcher.executor if isinstance(fetcher.executor, str) else repr(fetcher.executor)
+        if fetcher.process is not None:
+            result['type'] = _type_name(fetcher.process)
+        return result
+    if isinstance(fetcher, _ValueFetcher):
+        return {'name': arg_name, 'key': fetcher.name or arg_name, 'source': fetcher.source,
+                'type': _type_name(fetcher.type), 'getlist': fetcher.getlist}
+    if isinstance(fetcher, _FileStreamFetcher):
+        return {'name': arg_name, 'key': fetcher.name or arg_name, 'source': 'files', 'type': 'stream',
+                'getlist': False}
+    if isinstance(fetcher, _CollectionFetcher):
+        children = [describe_fetcher(_ValueFetcher(fetcher.source), name) for name in fetcher.names]
+        children.extend(describe_fetcher(child, name) for name, child in sorted(fetcher.fetchers.items()))
+        return {'name': arg_name, 'source': 'collection', 'children': children}
+    if isinstance(fetcher, Schema):
+        children = [
+            {'name': field_name, 'key': field.name or field_name, 'source': fetcher.source,
+             'type': _type_name(field.type), 'getlist': False}
+            for field_name, field in sorted(fetcher.fields.items())]
+        return {'name': arg_name, 'source': 'schema', 'children': children}
+    return {'name': arg_name, 'source': None, 'type': _type_name(fetcher), 'getlist': False}
+
+
+def describe_plan(plan):
+    arguments = []
+    for arg_name in plan.arg_names:
+        fetcher = plan.fetchers.get(arg_name) or plan.implicit_fetchers.get(arg_name)
+        arguments.append(describe_fetcher(fetcher or _ValueFetcher(plan.source), arg_name))
+
+    sources = set(plan.sources)
+    if plan.fallback_names:
+        sources.add(plan.source)
+    wrapper_type = plan.wrapper_type
+    return {
+        'function': '{0}.{1}'.format(plan.func.__module__, getattr(plan.func, '__qualname__', plan.func.__name__)),
+        'sources': sorted(sources),
+        'parses_body': any(wrapper_type.source_cost(source) >= SOURCE_COST_BODY for source in sources),
+        'arguments': arguments,
+    }
+
+
+def _find_plan(func):
+    # other decorators applied on top of request_args are unwrapped
+    while func is not None:
+        plan = getattr(func, 'extraction_plan', None)
+        if plan is not None:
+            return plan
+        func = getattr(func, '__wrapped__', None)
+    return None
+
+
+def iter_view_plans(app):
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        view_func = app.view_functions.get(rule.endpoint)
+        view_class = getattr(view_func, 'view_class', None)
+        if view_class is None:
+            plan = _find_plan(view_func)
+            if plan is not None:
+                yield rule, rule.endpoint, plan
+            continue
+        for name in _VIEW_METHODS:
+            plan = _find_plan(getattr(view_class, name, None))
+            if plan is not None:
+                yield rule, '{0}.{1}'.format(rule.endpoint, name), plan
+
+
+def time_plan(app, plan, samples, repeat):
+    # only the extraction is timed (including the parsing of the sources it
+    # reads), not the view itself
+    total = 0.0
+    runs = 0
+    for sample in samples:
+        for _ in range(repeat):
+            with app.test_request_context(**sample):
+                request = plan.wrapper_type.create()
+                started = default_timer()
+                plan.fill(request, {})
+                total += default_timer() - started
+                runs += 1
+    return total / runs if runs else None, runs
+
+
+def _format_argument(argument, depth=0):
+    details = []
+    if argument.get('type'):
+        details.append('type={0}'.format(argument['type']))
+    if argument.get('getlist'):
+        details.append('getlist')
+    if argument.get('offload'):
+        details.append('offload={0}'.format(argument['offload']))
+    if argument.get('key', argument['name']) != argument['name']:
+        details.append('key={0}'.format(argument['key']))
+    lines = ['{0}{1:<{2}} {3:<12} {4}'.format(
+        '    ' * (depth + 1), argument['name'], max(16 - 4 * depth, 1), argument['source'] or '(callable)',
+        ' '.join(details)).rstrip()]
+    for child in argument.get('children', ()):
+        lines.extend(_format_argument(child, depth + 1))
+    return lines
+
+
+@click.group('reqarg')
+def reqarg():
+    """Inspect views decorated with request_args."""
+
+
+@reqarg.command('audit')
+@click.option('--samples', type=click.File('r'),
+              help='JSON object mapping endpoints to lists of test_request_context() arguments to replay.')
+@click.option('--replay', is_flag=True, help='Also replay an empty GET request to rules without arguments.')
+@click.option('--repeat', default=100, show_default=True, help='Number of times each sample is replayed.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+@with_appcontext
+def audit(samples, replay, repeat, as_json):
+    """List the arguments of every view and where they are fetched from."""
+    app = current_app._get_current_object()
+    samples = json.load(samples) if samples is not None else {}
+
+    report = []
+    for rule, endpoint, plan in iter_view_plans(app):
+        entry = describe_plan(plan)
+        entry['rule'] = rule.rule
+        entry['endpoint'] = endpoint
+        entry['methods'] = sorted(rule.methods - set(['HEAD', 'OPTIONS']))
+
+        view_samples = samples.get(rule.endpoint)
+        if view_samples is None and replay and not rule.arguments and 'GET' in rule.methods:
+            view_samples = [{'path': rule.rule}]
+        if view_samples:
+            view_samples = [dict({'path': rule.rule}, **sample) for sample in view_samples]
+            entry['average_time'], entry['runs'] = time_plan(app, plan, view_samples, repeat)
+        report.append(entry)
+
+    if as_json:
+        click.echo(json.dumps(report, indent=2, sort_keys=True))
+        return
+
+    for entry in report:
+        click.echo('{0} [{1}] -> {2}{3}'.format(
+            entry['rule'], ', '.join(entry['methods']), entry['endpoint'],
+            ' (parses body)' if entry['parses_body'] else ''))
+        for argument in entry['arguments']:
+            for line in _format_argument(argument):
+                click.echo(line)
+        if entry.get('runs'):
+            click.echo('    average extraction time: {0:.1f} us ({1} runs)'.format(
+                entry['average_time'] * 1e6, entry['runs']))
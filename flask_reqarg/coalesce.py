@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+from threading import Event, Lock
+
+__all__ = (
+    'SingleFlight',
+)
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    # concurrent calls with the same key share a single execution: the first
+    # caller runs it, and the others wait for (and return) its result
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+
+    def call(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
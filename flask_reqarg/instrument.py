@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from threading import Lock
+
+__all__ = (
+    'Instrument',
+    'StatsCollector',
+    'add_instrument',
+    'remove_instrument'
+)
+
+# the registered instruments; decorated functions only take the instrumented
+# (and slower) extraction path while this is not empty
+_instruments = []
+
+
+def add_instrument(instrument):
+    if instrument not in _instruments:
+        _instruments.append(instrument)
+
+
+def remove_instrument(instrument):
+    if instrument in _instruments:
+        _instruments.remove(instrument)
+
+
+class Instrument(object):
+    def extraction_started(self, func):
+        pass
+
+    def source_resolved(self, func, source, elapsed):
+        pass
+
+    def argument_extracted(self, func, arg_name, source, elapsed):
+        pass
+
+    def conversion_failed(self, func, arg_name, value, error):
+        pass
+
+    def extraction_finished(self, func, elapsed):
+        pass
+
+
+def _func_name(func):
+    return '{0}.{1}'.format(func.__module__, getattr(func, '__qualname__', func.__name__))
+
+
+class StatsCollector(Instrument):
+    # aggregates call counts and total seconds spent, keyed by the qualified
+    # name of the decorated function
+    def __init__(self):
+        self._lock = Lock()
+        self.clear()
+
+    def clear(self):
+        self.extractions = defaultdict(lambda: [0, 0.0])
+        self.sources = defaultdict(lambda: [0, 0.0])
+        self.arguments = defaultdict(lambda: [0, 0.0])
+        self.conversion_failures = defaultdict(int)
+
+    def _add(self, stats, key, elapsed):
+        with self._lock:
+            entry = stats[key]
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def source_resolved(self, func, source, elapsed):
+        self._add(self.sources, (_func_name(func), source), elapsed)
+
+    def argument_extracted(self, func, arg_name, source, elapsed):
+        self._add(self.arguments, (_func_name(func), arg_name), elapsed)
+
+    def conversion_failed(self, func, arg_name, value, error):
+        with self._lock:
+            self.conversion_failures[(_func_name(func), arg_name)] += 1
+
+    def extraction_finished(self, func, elapsed):
+        self._add(self.extractions, _func_name(func), elapsed)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import json
+import re
+
+from .base import _PlainDict
+
+__all__ = (
+    'JSONDict',
+    'IncrementalJSON',
+    'scan_object'
+)
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_SCALAR = re.compile(r'[^,\]}\s]+')
+
+_decoder = json.JSONDecoder()
+
+
+def _skip_whitespace(text, idx):
+    return _WHITESPACE.match(text, idx).end()
+
+
+def _skip_value(text, idx):
+    # finds the end of the value at idx without decoding it; the skipped
+    # value is not validated
+    char = text[idx:idx + 1]
+    if char == '"':
+        match = _STRING.match(text, idx)
+        if match is None:
+            raise ValueError('Unterminated string at {0}'.format(idx))
+        return match.end()
+
+    if char in ('[', '{'):
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(text, idx)
+            if match is None:
+                raise ValueError('Unterminated value at {0}'.format(idx))
+            char = match.group()
+            if char == '"':
+                idx = _skip_value(text, match.start())
+                continue
+
+            idx = match.end()
+            if char in ('[', '{'):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return idx
+
+    match = _SCALAR.match(text, idx)
+    if match is None:
+        raise ValueError('Expecting value at {0}'.format(idx))
+    return match.end()
+
+
+def _expect(text, idx, char):
+    if text[idx:idx + 1] != char:
+        raise ValueError('Expecting {0!r} at {1}'.format(char, idx))
+    return _skip_whitespace(text, idx + 1)
+
+
+def scan_object(text, keys):
+    """Decodes only the values of the given top-level keys of a JSON object.
+
+    Other values are skipped without being decoded. As with
+    :func:`json.loads`, the last value of a duplicated key wins, so the
+    whole object is scanned.
+    """
+    wanted = frozenset(keys)
+    result = {}
+
+    idx = _expect(text, _skip_whitespace(text, 0), '{')
+    if text[idx:idx + 1] == '}':
+        return result
+
+    while True:
+        match = _STRING.match(text, idx)
+        if match is None:
+            raise ValueError('Expecting property name at {0}'.format(idx))
+        key = json.loads(match.group())
+        idx = _expect(text, _skip_whitespace(text, match.end()), ':')
+
+        if key in wanted:
+            result[key], idx = _decoder.raw_decode(text, idx)
+        else:
+            idx = _skip_value(text, idx)
+
+        idx = _skip_whitespace(text, idx)
+        if text[idx:idx + 1] == '}':
+            return result
+        idx = _expect(text, idx, ',')
+
+
+class JSONDict(_PlainDict):
+    pass
+
+
+class IncrementalJSON(object):
+    # a mapping over a JSON object which only decodes the keys that are
+    # looked up; keys fetched together are found in a single scan
+    def __init__(self, text):
+        self._text = text
+        self._values = JSONDict()
+        self._scanned = set()
+
+    def get_many(self, keys, default=None):
+        pending = [key for key in keys if key not in self._scanned]
+        if pending:
+            try:
+                self._values.update(scan_object(self._text, pending))
+            except ValueError:
+                pass
+            self._scanned.update(pending)
+        get = self._values.get
+        return [get(key, default) for key in keys]
+
+    def get(self, key, default=None):
+        return self.get_many((key,), default)[0]
+
+    def getlist(self, key):
+        self.get_many((key,))
+        return self._values.getlist(key)
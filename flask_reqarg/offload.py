@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from threading import Lock
+
+try:
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+except ImportError:
+    ProcessPoolExecutor = ThreadPoolExecutor = None
+
+__all__ = (
+    'set_executor',
+    'shutdown_executors',
+)
+
+_EXECUTOR_TYPES = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+_executors = {}
+_lock = Lock()
+
+
+def check_executor(executor):
+    if executor in _EXECUTOR_TYPES:
+        if _EXECUTOR_TYPES[executor] is None:
+            raise TypeError('offloading requires concurrent.futures (the futures package)')
+    elif not hasattr(executor, 'submit'):
+        raise TypeError('unknown executor {0!r}'.format(executor))
+
+
+def get_executor(executor):
+    # the shared pools are created on first use, so applications which don't
+    # offload anything never start them
+    if not isinstance(executor, str):
+        return executor
+    try:
+        return _executors[executor]
+    except KeyError:
+        with _lock:
+            if executor not in _executors:
+                _executors[executor] = _EXECUTOR_TYPES[executor]()
+            return _executors[executor]
+
+
+def set_executor(kind, executor):
+    if kind not in _EXECUTOR_TYPES:
+        raise TypeError('unknown executor {0!r}'.format(kind))
+    with _lock:
+        _executors[kind] = executor
+
+
+def shutdown_executors(wait=True):
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+from werkzeug.exceptions import BadRequest
+
+from .base import (_Fetcher, _bind_error_handler, _check_source, _extract_opt_source,
+                   _extract_opt_storage_type, _make_record_type, _missing)
+
+__all__ = (
+    'Field',
+    'Schema',
+    'ValidationError'
+)
+
+
+class ValidationError(BadRequest):
+    def __init__(self, errors):
+        super(ValidationError, self).__init__('; '.join(
+            '{0} {1}'.format(field_name, message) for field_name, message in sorted(errors.items())))
+        self.errors = errors
+
+
+def _check_min(bound):
+    def check(value):
+        if value < bound:
+            return 'must be at least {0!r}'.format(bound)
+    return check
+
+
+def _check_max(bound):
+    def check(value):
+        if value > bound:
+            return 'must be at most {0!r}'.format(bound)
+    return check
+
+
+def _check_min_length(bound):
+    def check(value):
+        if len(value) < bound:
+            return 'must have at least {0} character(s)'.format(bound)
+    return check
+
+
+def _check_max_length(bound):
+    def check(value):
+        if len(value) > bound:
+            return 'must have at most {0} character(s)'.format(bound)
+    return check
+
+
+def _check_regex(pattern):
+    match = re.compile(pattern).match
+
+    def check(value):
+        if match(value) is None:
+            return 'must match {0!r}'.format(pattern)
+    return check
+
+
+def _check_choices(choices):
+    choices = frozenset(choices)
+
+    def check(value):
+        if value not in choices:
+            return 'must be one of {0}'.format(', '.join(sorted(repr(choice) for choice in choices)))
+    return check
+
+
+_NUMBER_TYPES = (int, float, complex, bool)
+
+
+class Field(object):
+    def __init__(self, name=None, type=None, default=None, required=False, min=None, max=None,
+                 min_length=None, max_length=None, regex=None, choices=None):
+        self.name = name
+        self.type = type
+        self.default = default
+        self.required = required
+
+        # checks which can't apply to the values are rejected when the schema
+        # is declared, rather than failing on every request
+        if type is None and (min is not None or max is not None):
+            raise TypeError('min and max need a type to convert the values to')
+        if type in _NUMBER_TYPES and (min_length is not None or max_length is not None or regex is not None):
+            raise TypeError('min_length, max_length and regex need string values, not {0}'.format(type.__name__))
+
+        # the checks are built once, so validating a request is just a loop
+        checks = []
+        if min is not None:
+            checks.append(_check_min(min))
+        if max is not None:
+            checks.append(_check_max(max))
+        if min_length is not None:
+            checks.append(_check_min_length(min_length))
+        if max_length is not None:
+            checks.append(_check_max_length(max_length))
+        if regex is not None:
+            checks.append(_check_regex(regex))
+        if choices is not None:
+            checks.append(_check_choices(choices))
+        self.checks = tuple(checks)
+
+
+class Schema(_Fetcher):
+    def __init__(self, **kwargs):
+        self.source = _extract_opt_source(kwargs)
+        self.storage_type = _extract_opt_storage_type(kwargs)
+        for field_name, field in kwargs.items():
+            if not isinstance(field, Field):
+                raise TypeError('schema field {0!r} is not a Field'.format(field_name))
+        self.fields = kwargs
+
+    def sources(self):
+        return frozenset([self.source])
+
+    def compile(self, wrapper_type, arg_name, on_error=None):
+        _check_source(wrapper_type, self.source)
+        source = self.source
+        storage_type = self.storage_type
+        items = sorted(self.fields.items())
+        if storage_type == 'record':
+            storage_type = _make_record_type(arg_name, [field_name for field_name, _ in items])
+        keys = tuple(field.name or field_name for field_name, field in items)
+        fields = tuple(
+            (field_name, field.type, field.default, field.required, field.checks,
+             _bind_error_handler(on_error, '{0}.{1}'.format(arg_name, field_name)))
+            for field_name, field in items)
+
+        def extract(request):
+            values = {}
+            errors = {}
+            raw_values = request.from_source_many(source, keys, _missing)
+            for (field_name, type, default, required, checks, on_error), value in zip(fields, raw_values):
+                if value is _missing:
+                    if required:
+                        errors[field_name] = 'is required'
+                    else:
+                        values[field_name] = default
+                    continue
+
+                if type is not None:
+                    try:
+                        value = type(value)
+                    except (ValueError, TypeError) as e:
+                        if on_error is not None:
+                            on_error(value, e)
+                        errors[field_name] = 'is not a valid value'
+                        continue
+
+                for check in checks:
+                    try:
+                        message = check(value)
+                    except TypeError:
+                        # such as a regex applied to the value returned by a
+                        # custom type
+                        message = 'is not a valid value'
+                    if message is not None:
+                        errors[field_name] = message
+                        break
+                else:
+                    values[field_name] = value
+
+            if errors:
+                raise ValidationError(errors)
+            return storage_type(**values)
+        return extract
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+try:
+    from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+except ImportError:
+    MultipartDecoder = None
+
+__all__ = (
+    'MultipartReader',
+)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MultipartReader(object):
+    # reads a multipart/form-data body straight from the input stream; parts
+    # are only available in the order they appear in the body, so a part that
+    # was skipped to reach a later one can't be read afterwards
+
+    def __init__(self, stream, boundary, chunk_size=CHUNK_SIZE):
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary)
+        self._chunk_size = chunk_size
+        self._finished = False
+
+    def _next_event(self):
+        while True:
+            event = self._decoder.next_event()
+            if not isinstance(event, NeedData):
+                return event
+            if self._finished:
+                return None
+
+            data = self._stream.read(self._chunk_size)
+            if data:
+                self._decoder.receive_data(data)
+            else:
+                self._decoder.receive_data(None)
+                self._finished = True
+
+    def iter_part(self, name):
+        while True:
+            event = self._next_event()
+            if event is None or isinstance(event, Epilogue):
+                return
+            if isinstance(event, (Field, File)) and event.name == name:
+                break
+
+        while True:
+            event = self._next_event()
+            if not isinstance(event, Data):
+                return
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
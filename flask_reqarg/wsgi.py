@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+import re
+from sys import version_info
+
+from flask import request as flask_request
+from werkzeug.datastructures import EnvironHeaders
+from werkzeug.wrappers import Request
+
+from .base import RequestWrapperBase, _PlainDict, _missing, _set_max_content_length
+from .jsonbody import JSONDict
+
+if version_info[0] == 2:
+    from urllib import unquote_plus
+else:
+    from urllib.parse import unquote_plus
+
+__all__ = (
+    'WSGIRequestWrapper',
+)
+
+_COOKIE_UNSLASH = re.compile(r'\\([0-3][0-7]{2}|.)')
+
+
+def _to_wire(name):
+    # WSGI passes the raw bytes of the query string and headers as latin-1
+    # strings, so names are compared in that form instead of decoding keys
+    if version_info[0] == 2:
+        return name.encode('utf-8') if isinstance(name, unicode) else name
+    return name.encode('utf-8').decode('latin-1')
+
+
+def _from_wire(value):
+    if version_info[0] == 2:
+        return value.decode('utf-8', 'replace')
+    return value.encode('latin-1').decode('utf-8', 'replace')
+
+
+def _unslash(match):
+    value = match.group(1)
+    return value if len(value) == 1 else chr(int(value, 8))
+
+
+class _ScanningSource(object):
+    # a read-only multi-value mapping over a raw header value which only
+    # decodes the values of the names that are looked up; names fetched
+    # together are found in a single scan
+    separator = None
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._values = {}
+
+    def _decode_key(self, key):
+        return key
+
+    def _decode_value(self, value):
+        return _from_wire(value)
+
+    def _scan(self, names):
+        pending = dict((_to_wire(name), name) for name in names if name not in self._values)
+        if not pending:
+            return
+
+        found = dict((name, []) for name in pending.values())
+        for pair in self._raw.split(self.separator):
+            key, _, value = pair.partition('=')
+            name = pending.get(self._decode_key(key))
+            if name is not None:
+                found[name].append(self._decode_value(value))
+        self._values.update(found)
+
+    def get_many(self, names, default=None):
+        self._scan(names)
+        values = self._values
+        return [values[name][0] if values[name] else default for name in names]
+
+    def get(self, name, default=None):
+        return self.get_many((name,), default)[0]
+
+    def getlist(self, name):
+        self._scan((name,))
+        return list(self._values[name])
+
+
+class QueryStringSource(_ScanningSource):
+    separator = '&'
+
+    def _decode_key(self, key):
+        if '%' in key or '+' in key:
+            return _to_wire(self._decode_value(key))
+        return key
+
+    def _decode_value(self, value):
+        return unquote_plus(_from_wire(value))
+
+
+class CookieSource(_ScanningSource):
+    separator = ';'
+
+    def _decode_key(self, key):
+        return key.strip()
+
+    def _decode_value(self, value):
+        value = _from_wire(value.strip())
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = _COOKIE_UNSLASH.sub(_unslash, value[1:-1])
+        return value
+
+
+class _ValuesSource(object):
+    # looks up the query string first and then the form data, like the
+    # ``values`` of Werkzeug requests
+    def __init__(self, query, get_form):
+        self._query = query
+        self._get_form = get_form
+
+    def get_many(self, names, default=None):
+        results = self._query.get_many(names, _missing)
+        missing = [name for name, value in zip(names, results) if value is _missing]
+        if missing:
+            form_get = self._get_form().get
+            found = dict((name, form_get(name, default)) for name in missing)
+            results = [found[name] if value is _missing else value
+                       for name, value in zip(names, results)]
+        return results
+
+    def get(self, name, default=None):
+        return self.get_many((name,), default)[0]
+
+    def getlist(self, name):
+        return self._query.getlist(name) + self._get_form().getlist(name)
+
+
+# fetches arguments straight from the WSGI environ: the query string and
+# cookies are scanned only for the names a view asks for instead of being
+# parsed into multi-value dicts, while body sources are read through the
+# request object bound to the environ (Flask's request, if there is one)
+class WSGIRequestWrapper(RequestWrapperBase):
+
+    @property
+    def environ(self):
+        return self._request
+
+    @property
+    def werkzeug_request(self):
+        result = self._request.get('werkzeug.request')
+        if result is None:
+            result = Request(self._request)
+        return result
+
+    @property
+    def get_dict(self):
+        return QueryStringSource(self._request.get('QUERY_STRING', ''))
+
+    @property
+    def post_dict(self):
+        return self.werkzeug_request.form
+
+    @property
+    def args_dict(self):
+        query = self.storage_dict('get')
+        if self._request.get('REQUEST_METHOD', 'GET') == 'GET':
+            return query
+        return _ValuesSource(query, lambda: self.storage_dict('post'))
+
+    @property
+    def cookies_dict(self):
+        return CookieSource(self._request.get('HTTP_COOKIE', ''))
+
+    @property
+    def files_dict(self):
+        return self.werkzeug_request.files
+
+    @property
+    def json_dict(self):
+        data = self.werkzeug_request.get_json(silent=True)
+        return JSONDict(data) if isinstance(data, dict) else JSONDict()
+
+    @property
+    def raw_body(self):
+        return memoryview(self.werkzeug_request.get_data(cache=True))
+
+    @property
+    def content_length(self):
+        try:
+            return max(0, int(self._request['CONTENT_LENGTH']))
+        except (KeyError, ValueError):
+            return None
+
+    def limit_content_length(self, limit):
+        super(WSGIRequestWrapper, self).limit_content_length(limit)
+        bound = self._request.get('werkzeug.request')
+        if bound is not None:
+            _set_max_content_length(bound, limit)
+
+    @classmethod
+    def create(cls, *args, **kwargs):
+        environ = flask_request.environ
+        return cls.shared(environ, environ)
+
+
+WSGIRequestWrapper.register_source('headers', lambda wrapper: EnvironHeaders(wrapper.environ))
+WSGIRequestWrapper.register_source('environ', lambda wrapper: _PlainDict(wrapper.environ))
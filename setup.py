@@ -20,6 +20,9 @@ setup(
     zip_safe=False,
     platforms='any',
     install_requires=['Flask'],
+    entry_points={
+        'flask.commands': ['reqarg=flask_reqarg.cli:reqarg'],
+    },
     classifiers=[
         'Environment :: Web Environment',
         'Intended Audience :: Developers',
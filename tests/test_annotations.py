@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from typing import List, Optional
+
+from flask import Flask
+from nose.tools import assert_equal
+
+from flask.ext.reqarg import *
+
+
+class TestAnnotations(object):
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def test_fetch_annotated_args(self):
+        @self.app.route('/items')
+        @self.app.route('/items/<int:page>')
+        @request_args(q=get('query'))
+        def view(q, page: int = 1, ids: List[int] = (), size: Optional[float] = None, sort='asc', *,
+                 tag: str = ''):
+            return repr((q, page, ids, size, sort, tag))
+
+        client = self.app.test_client()
+        resp = client.get('/items', query_string={'query': 'x', 'ids': ['1', 'a', '3'], 'size': '2.5',
+                                                  'tag': 'web'})
+        assert_equal(resp.get_data(True), repr(('x', 1, [1, 3], 2.5, 'asc', 'web')))
+        resp = client.get('/items/3', query_string={'page': '5', 'size': 'abc', 'sort': 'desc'})
+        assert_equal(resp.get_data(True), repr((None, 3, [], None, 'desc', '')))
+
+        plan = view.extraction_plan
+        assert_equal(plan.arg_names, ('q', 'page', 'ids', 'size', 'sort', 'tag'))
+        assert_equal(sorted(plan.implicit_fetchers), ['ids', 'page', 'size', 'sort', 'tag'])
+
+    def test_fetch_bool_args(self):
+        @self.app.route('/items')
+        @request_args()
+        def view(draft: bool = False, public: Optional[bool] = None):
+            return repr((draft, public))
+
+        client = self.app.test_client()
+        for value, expected in [('1', True), ('true', True), ('On', True), ('yes', True), ('0', False),
+                                ('false', False), ('off', False), ('no', False), ('maybe', None)]:
+            resp = client.get('/items', query_string={'draft': value, 'public': value})
+            assert_equal(resp.get_data(True), repr((bool(expected), expected)))
+        assert_equal(client.get('/items').get_data(True), repr((False, None)))
+
+    def test_unresolved_annotations(self):
+        @self.app.route('/items')
+        @request_args()
+        def view(page: 'Missing' = 1, size: int = 20):
+            return repr((page, size))
+
+        client = self.app.test_client()
+        resp = client.get('/items', query_string={'page': '2', 'size': '5'})
+        assert_equal(resp.get_data(True), repr(('2', 5)))
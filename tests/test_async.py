@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+from flask import Flask
+from nose.tools import assert_equal
+from werkzeug.datastructures import MultiDict
+
+from flask.ext.reqarg import *
+from flask.ext.reqarg import RequestWrapperBase
+
+
+class _AwaitableRequestWrapper(RequestWrapperBase):
+    async_sources = True
+
+    async def _resolve(self, source):
+        return MultiDict(self._request.get(source, {}))
+
+    @property
+    def get_dict(self):
+        return self._resolve('get')
+
+    @property
+    def post_dict(self):
+        return self._resolve('post')
+
+    @property
+    def args_dict(self):
+        return self._resolve('args')
+
+    @property
+    def cookies_dict(self):
+        return self._resolve('cookies')
+
+    @property
+    def files_dict(self):
+        return self._resolve('files')
+
+    @classmethod
+    def create(cls, *args, **kwargs):
+        return cls(_AwaitableRequestWrapper.current)
+
+
+class TestAsync(object):
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def test_fetch_request_args_in_coroutine(self):
+        @request_args(x=get(), y=post(type=int))
+        async def view(x, y):
+            await asyncio.sleep(0)
+            return 'x={0},y={1}'.format(x, y)
+
+        with self.app.test_request_context(
+                method='POST',
+                query_string={'x': 'ijk'},
+                data={'y': '123'}):
+            assert_equal(asyncio.run(view()), 'x=ijk,y=123')
+
+    def test_await_sources(self):
+        @_AwaitableRequestWrapper.request_args(y=post(type=int))
+        async def view(x, y):
+            return 'x={0},y={1}'.format(x, y)
+
+        _AwaitableRequestWrapper.current = {'args': {'x': 'ijk'}, 'post': {'y': '123'}}
+        assert_equal(asyncio.run(view()), 'x=ijk,y=123')
+        assert_equal(asyncio.run(view(x='abc')), 'x=abc,y=123')
+
+    def test_coalesce_concurrent_calls(self):
+        calls = []
+
+        @request_args(x=get(), _coalesce=True)
+        async def view(x, y):
+            calls.append(y)
+            await asyncio.sleep(0.01)
+            return x + y
+
+        async def run():
+            return await asyncio.gather(view(y='1'), view(y='1'), view(y='2'))
+
+        with self.app.test_request_context(query_string={'x': 'a'}):
+            assert_equal(asyncio.run(run()), ['a1', 'a1', 'a2'])
+        assert_equal(sorted(calls), ['1', '2'])
+
+        @request_args(_source='get', _coalesce=True)
+        async def slow(n, y):
+            calls.append(n)
+            await asyncio.sleep(0.01)
+            return n
+
+        async def run_positional():
+            return await asyncio.gather(slow(1), slow(1), slow(2))
+
+        with self.app.test_request_context():
+            assert_equal(asyncio.run(run_positional()), [1, 1, 2])
+        assert_equal(sorted(calls[2:]), [1, 2])
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List
+
+from flask import Flask
+from nose.tools import assert_equal
+
+from flask.ext.reqarg import *
+
+if TYPE_CHECKING:
+    from decimal import Decimal
+
+
+class TestPostponedAnnotations(object):
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def test_fetch_annotated_args(self):
+        @self.app.route('/items')
+        @request_args()
+        def view(page: int = 1, ids: List[int] = (), price: Decimal = None, ref: 'Missing' = None):
+            return repr((page, ids, price, ref))
+
+        client = self.app.test_client()
+        resp = client.get('/items', query_string={'page': '3', 'ids': ['1', 'a'], 'price': '2.5', 'ref': 'x'})
+        assert_equal(resp.get_data(True), repr((3, [1], '2.5', 'x')))
@@ -5,11 +5,18 @@ try:
 except ImportError:
     from StringIO import StringIO as BytesIO
 
-from flask import Flask, make_response
+import json as json_module
+from threading import Event, Thread
+from unittest import SkipTest
+
+from flask import Flask, make_response, request
 from flask.views import View, MethodView
-from nose.tools import assert_equal
+from nose.tools import assert_equal, assert_raises
 
 from flask.ext.reqarg import *
+from flask.ext.reqarg import _FlaskRequestWrapper
+from flask.ext.reqarg.cli import reqarg
+from flask.ext.reqarg.jsonbody import scan_object
 
 
 class TestReqArg(object):
@@ -86,6 +93,232 @@ class TestReqArg(object):
         with self.app.test_request_context():
             assert_equal(view(), 'x=bar,y=None,z=999')
 
+    def test_fetch_typed_request_args_list(self):
+        @request_args(ids=get(getlist=True, type=int), xs=get(getlist=True, type=float, array=True),
+                      ys=post(getlist=True, type=int, array='b'))
+        def view(ids, xs, ys):
+            return ids, xs, ys
+
+        with self.app.test_request_context(
+                method='POST',
+                query_string={'ids': ['1', 'x', '3'], 'xs': ['1.5', '2']},
+                data={'ys': ['1', '1000', '-1']}):
+            ids, xs, ys = view()
+            assert_equal(ids, [1, 3])
+            assert_equal((xs.typecode, xs.tolist()), ('d', [1.5, 2.0]))
+            assert_equal((ys.typecode, ys.tolist()), ('b', [1, -1]))
+
+        assert_raises(TypeError, get, array=True)
+        assert_raises(TypeError, get, getlist=True, type=str, array=True)
+
+    def test_resolve_sources_lazily(self):
+        @request_args(x=get())
+        def view(x):
+            return x
+
+        stream = BytesIO(b'hello, world')
+        with self.app.test_request_context(
+                method='POST',
+                query_string={'x': 'ijk'},
+                data={'hello': (stream, 'hello.txt')}):
+            assert_equal(view(), 'ijk')
+            assert_equal('form' in request.__dict__, False)
+            assert_equal('files' in request.__dict__, False)
+
+    def test_reject_invalid_spec(self):
+        def view(x, y):
+            pass
+
+        assert_raises(TypeError, request_args(get(), get(), get()), view)
+        assert_raises(TypeError, request_args(z=get()), view)
+        assert_raises(TypeError, request_args(get(), x=post()), view)
+        assert_raises(TypeError, request_args(y=42), view)
+
+    def test_bind_positional_args(self):
+        class Greeter(object):
+            @request_args
+            def greet(self, name):
+                return '{0}, {1}!'.format(self.greeting, name)
+
+        greeter = Greeter()
+        greeter.greeting = 'Hi'
+        with self.app.test_request_context(query_string={'name': 'John'}):
+            assert_equal(greeter.greet(), 'Hi, John!')
+
+    def test_share_extraction_within_request(self):
+        calls = []
+
+        def parse(value):
+            calls.append(value)
+            return int(value)
+
+        @request_args(x=get(type=parse), y=get(type=parse, default=0))
+        def helper(x, y):
+            return x + y
+
+        @request_args(x=get(type=parse, default=-1))
+        def view(x):
+            return x, helper()
+
+        with self.app.test_request_context(query_string={'x': '1', 'y': 'abc'}):
+            assert_equal(view(), (1, 1))
+            assert_equal(helper(), 1)
+            assert_equal(sorted(calls), ['1', 'abc'])
+            assert_equal(_FlaskRequestWrapper.create(), _FlaskRequestWrapper.create())
+
+        with self.app.test_request_context(query_string={'x': '2'}):
+            assert_equal(view(), (2, 2))
+            assert_equal(len(calls), 3)
+
+        with self.app.test_request_context() as ctx:
+            _FlaskRequestWrapper.create()
+            environ = ctx.request.environ
+        assert_equal('reqarg.wrappers' in environ, False)
+
+    def test_cached_type(self):
+        to_int = cached(int, maxsize=2)
+
+        @request_args(x=get(type=to_int, default=-1))
+        def view(x):
+            return x
+
+        for x, expected in [('1', 1), ('2', 2), ('1', 1), ('abc', -1), ('3', 3), ('2', 2)]:
+            with self.app.test_request_context(query_string={'x': x}):
+                assert_equal(view(), expected)
+
+        info = to_int.cache_info()
+        assert_equal((info.hits, info.misses, info.maxsize, info.currsize), (1, 5, 2, 2))
+
+    def test_instrument_extraction(self):
+        @request_args(x=get(type=int, default=0), item=collection('a', b=post(type=int)))
+        def view(x, y, item):
+            return x
+
+        collector = StatsCollector()
+        add_instrument(collector)
+        try:
+            with self.app.test_request_context(
+                    method='POST',
+                    query_string={'x': 'abc', 'y': 'ijk'},
+                    data={'a': 'pqr', 'b': 'xyz'}):
+                assert_equal(view(), 0)
+        finally:
+            remove_instrument(collector)
+
+        assert_equal(len(collector.extractions), 1)
+        name, (count, _) = list(collector.extractions.items())[0]
+        assert_equal(count, 1)
+        assert_equal(sorted(source for _, source in collector.sources), ['args', 'get', 'post'])
+        assert_equal(sorted(arg for _, arg in collector.arguments), ['item', 'x', 'y'])
+        assert_equal(dict(collector.conversion_failures), {(name, 'x'): 1, (name, 'item.b'): 1})
+
+    def test_cache_results(self):
+        calls = []
+        cache = LRUCache(maxsize=2, ttl=60)
+
+        @request_args(page=get(type=int, default=1), tags=get(getlist=True), _source='get',
+                      _cache=cache)
+        def view(page, tags, q):
+            calls.append((page, tags, q))
+            return '{0}:{1}:{2}'.format(page, ','.join(tags), q)
+
+        for query_string in [
+                {'page': '2', 'tags': ['a', 'b'], 'q': 'x'},
+                {'page': '2', 'tags': ['a', 'b'], 'q': 'x', 'utm_source': 'ad'},
+                {'page': '1', 'q': 'x'},
+                {'q': 'x'},
+                {'page': '2', 'tags': ['b', 'a'], 'q': 'x'}]:
+            with self.app.test_request_context(query_string=query_string):
+                view()
+
+        assert_equal(calls, [(2, ['a', 'b'], 'x'), (1, [], 'x'), (2, ['b', 'a'], 'x')])
+        assert_equal(cache.info().currsize, 2)
+
+        helper_calls = []
+
+        @request_args(_source='get', _cache=LRUCache())
+        def helper(x, y):
+            helper_calls.append((x, y))
+            return x
+
+        class Greeter(object):
+            @request_args(_source='get', _cache=LRUCache())
+            def greet(self, name, y):
+                return name
+
+        with self.app.test_request_context(query_string={'y': 'ijk'}):
+            assert_equal([helper(1), helper(2), helper(1), helper(x=2)], [1, 2, 1, 2])
+            assert_equal(helper_calls, [(1, 'ijk'), (2, 'ijk')])
+            assert_equal([Greeter().greet('a'), Greeter().greet('b')], ['a', 'b'])
+            marker = object()
+            assert_equal([helper(marker), helper(marker)], [marker, marker])
+            assert_equal(len(helper_calls), 4)
+
+        expiring = LRUCache(ttl=0)
+        expiring.set('key', 'value')
+        assert_equal(expiring.get('key'), None)
+
+    def test_coalesce_concurrent_calls(self):
+        calls = []
+        started = Event()
+        release = Event()
+
+        @request_args(x=get(), _coalesce=True)
+        def view(x):
+            calls.append(x)
+            started.set()
+            release.wait()
+            return x * 2
+
+        results = []
+
+        def request_view(x):
+            with self.app.test_request_context(query_string={'x': x}):
+                results.append(view())
+
+        leader = Thread(target=request_view, args=('a',))
+        leader.start()
+        started.wait()
+        followers = [Thread(target=request_view, args=(x,)) for x in ('a', 'a', 'b')]
+        for thread in followers:
+            thread.start()
+        while len(calls) < 2:
+            release.wait(0.01)
+        # give the other followers time to join the in-flight call
+        release.wait(0.2)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        assert_equal(sorted(calls), ['a', 'b'])
+        assert_equal(sorted(results), ['aa', 'aa', 'aa', 'bb'])
+
+        positional_calls = []
+        both_started = Event()
+
+        @request_args(_source='get', _coalesce=True)
+        def slow(n, y):
+            positional_calls.append(n)
+            if len(positional_calls) == 2:
+                both_started.set()
+            both_started.wait(5)
+            return n
+
+        positional_results = []
+
+        def request_slow(n):
+            with self.app.test_request_context():
+                positional_results.append(slow(n))
+
+        threads = [Thread(target=request_slow, args=(n,)) for n in (1, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert_equal(sorted(positional_calls), [1, 2])
+        assert_equal(sorted(positional_results), [1, 2])
+
     def test_fetch_request_args_list(self):
         @request_args(args=get(getlist=True))
         def view(args):
@@ -95,6 +328,17 @@ class TestReqArg(object):
                 query_string={'args': ['abc', 'ijk', 'xyz']}):
             assert_equal(view(), 'abc, ijk, xyz')
 
+    def test_fetch_many_args_from_source(self):
+        names = ['a{0}'.format(i) for i in range(40)]
+        query_string = dict((name, name.upper()) for name in names[::2])
+        query_string['ids'] = ['1', '2']
+        with self.app.test_request_context(query_string=query_string):
+            request = _FlaskRequestWrapper.create()
+            expected = [name.upper() if i % 2 == 0 else None for i, name in enumerate(names)]
+            assert_equal(request.from_source_many('get', names), expected)
+            assert_equal(request.lists_from_source_many('get', ['ids', 'a0', 'x']),
+                         [['1', '2'], ['A0'], []])
+
     def test_fetch_request_args_with_default_source(self):
         @request_args(get(), z=get(), _source='post')
         def view(x, y, z):
@@ -125,6 +369,236 @@ class TestReqArg(object):
                 data={'hello': (stream, 'hello.txt')}):
             assert_equal(view(), '[hello.txt] hello, world')
 
+    def test_stream_files(self):
+        @request_args(hello=files(stream=True), world=files(stream=True))
+        def view(hello, world):
+            return b'|'.join([b''.join(hello), b''.join(world)]).decode()
+
+        with self.app.test_request_context(
+                method='POST',
+                data={
+                    'hello': (BytesIO(b'hello, ' * 20000), 'hello.txt'),
+                    'world': (BytesIO(b'world'), 'world.txt')
+                }):
+            assert_equal(view(), '{0}|world'.format('hello, ' * 20000))
+            assert_equal('form' in request.__dict__, False)
+
+        with self.app.test_request_context(
+                method='POST',
+                data={'hello': (BytesIO(b'hello'), 'hello.txt')}):
+            request.files
+            assert_equal(view(), 'hello|')
+
+        def upload(upload, name):
+            pass
+
+        class UploadView(MethodView):
+            @request_args(upload=files(stream=True))
+            def post(self, upload):
+                return b''.join(upload).decode()
+
+        assert_raises(TypeError, request_args(upload=files(stream=True), name=post()), upload)
+        assert_raises(TypeError, request_args(upload=files(stream=True), name=files()), upload)
+        request_args(upload=files(stream=True), name=get())(upload)
+        request_args(upload=files(stream=True), _source='get')(upload)
+
+        collector = StatsCollector()
+        add_instrument(collector)
+        try:
+            with self.app.test_request_context(method='POST', data={'upload': (BytesIO(b'hello'), 'a.txt')}):
+                assert_equal(UploadView().post(), 'hello')
+                assert_equal('form' in request.__dict__, False)
+        finally:
+            remove_instrument(collector)
+
+        # arguments without fetchers must be passed, e.g. by the URL rule
+        @self.app.route('/upload/<name>', methods=['POST'])
+        @request_args(upload=files(stream=True))
+        def url_view(name, upload):
+            return '{0}:{1}'.format(name, b''.join(upload).decode())
+
+        resp = self.app.test_client().post('/upload/a', data={'upload': (BytesIO(b'hello'), 'a.txt')})
+        assert_equal(resp.get_data(True), 'a:hello')
+        with self.app.test_request_context(method='POST', data={'upload': (BytesIO(b'hello'), 'a.txt')}):
+            assert_raises(TypeError, url_view)
+
+    def test_enforce_limits(self):
+        @request_args(q=get(max_len=5), ids=get(getlist=True, type=int, max_items=3))
+        def view(q, ids):
+            return q, ids
+
+        @request_args(upload=files(max_bytes=10))
+        def upload_view(upload):
+            return upload.read()
+
+        @request_args(upload=files(stream=True, max_bytes=10))
+        def stream_view(upload):
+            return b''.join(upload)
+
+        @request_args(_max_content_length=100)
+        def small_view(x):
+            return x
+
+        with self.app.test_request_context(query_string={'q': 'flask', 'ids': ['1', '2']}):
+            assert_equal(view(), ('flask', [1, 2]))
+
+        with self.app.test_request_context(query_string={'q': 'werkzeug'}):
+            assert_raises(LimitExceeded, view)
+
+        with self.app.test_request_context(query_string={'ids': ['1', '2', '3', '4']}):
+            assert_raises(LimitExceeded, view)
+
+        with self.app.test_request_context(method='POST', data={'upload': (BytesIO(b'hello'), 'a.txt')}):
+            assert_equal(upload_view(), b'hello')
+
+        with self.app.test_request_context(method='POST', data={'upload': (BytesIO(b'x' * 20), 'a.txt')}):
+            assert_raises(LimitExceeded, stream_view)
+
+        with self.app.test_request_context(method='POST', data={'upload': (BytesIO(b'x' * 20), 'a.txt')}):
+            assert_raises(LimitExceeded, upload_view)
+
+        with self.app.test_request_context(method='POST', data={'x': 'y' * 200}):
+            assert_raises(LimitExceeded, small_view)
+            assert_equal(request.__dict__.get('form'), None)
+
+    def test_fetch_lazy_args(self):
+        calls = []
+
+        def parse(value):
+            calls.append(value)
+            return int(value)
+
+        @self.app.route('/items/<name>', methods=['POST'])
+        @request_args(x=get(type=parse), upload=files(), _source='get', _lazy=True)
+        def view(name, x, upload, debug):
+            if debug():
+                return repr(upload())
+            return '{0}:{1}:{2}'.format(name(), x(), x())
+
+        client = self.app.test_client()
+        with self.app.test_request_context(
+                '/items/foo', method='POST',
+                query_string={'x': '1'},
+                data={'upload': (BytesIO(b'hello'), 'hello.txt')}):
+            assert_equal(view(name='foo'), 'foo:1:1')
+            assert_equal(calls, ['1'])
+            assert_equal('form' in request.__dict__, False)
+
+        resp = client.post('/items/foo', query_string={'debug': '1'})
+        assert_equal(resp.get_data(True), 'None')
+
+        assert_raises(TypeError, request_args, _lazy=True, _coalesce=True)
+
+    def test_map_files(self):
+        @request_args(hello=files(mmap=True), worlds=files('world', getlist=True, mmap=True))
+        def view(hello, worlds):
+            return hello, worlds
+
+        with self.app.test_request_context(
+                method='POST',
+                data={
+                    'hello': (BytesIO(b'hello'), 'hello.txt'),
+                    'world': [(BytesIO(b'world' * 200000), 'a.txt'), (BytesIO(b''), 'b.txt')]
+                }):
+            hello, worlds = view()
+            assert_equal((hello.readonly, hello.tobytes()), (True, b'hello'))
+            assert_equal([(view.readonly, len(view)) for view in worlds], [(True, 1000000), (True, 0)])
+            assert_equal(worlds[0][-5:].tobytes(), b'world')
+            assert_equal(view()[0] is hello, True)
+
+    def test_offload_conversions(self):
+        ready = {'x': Event(), 'y': Event()}
+
+        def meet(name, other):
+            def convert(value):
+                ready[name].set()
+                if not ready[other].wait(5):
+                    raise ValueError('not run in parallel')
+                return int(value)
+            return convert
+
+        @request_args(x=get(type=meet('x', 'y'), default=-1, offload=True),
+                      y=get(type=meet('y', 'x'), default=-1, offload=True),
+                      size=files('upload', process=len), z=get(type=int))
+        def view(x, y, size, z):
+            return x, y, size, z
+
+        with self.app.test_request_context(
+                method='POST',
+                query_string={'x': '1', 'y': '2', 'z': '3'},
+                data={'upload': (BytesIO(b'hello'), 'hello.txt')}):
+            assert_equal(view(), (1, 2, 5, 3))
+
+        def check_size(data):
+            if len(data) > 3:
+                raise ValueError('too large')
+            return len(data)
+
+        @request_args(x=get(type=int, default=-1, offload=True), sizes=files('upload', getlist=True,
+                                                                            process=check_size))
+        def failing_view(x, sizes):
+            return x, sizes
+
+        with self.app.test_request_context(
+                method='POST',
+                query_string={'x': 'abc'},
+                data={'upload': [(BytesIO(b'hello'), 'a.txt'), (BytesIO(b'hi'), 'b.txt')]}):
+            assert_equal(failing_view(), (-1, [2]))
+
+        assert_raises(TypeError, get, offload=True, executor='gpu')
+        assert_raises(TypeError, files, executor='process')
+
+    def test_validate_schema(self):
+        search = Schema(
+            q=Field(required=True, max_length=10),
+            page=Field(type=int, default=1, min=1, max=100),
+            order=Field(choices=('asc', 'desc'), default='asc'),
+            tag=Field(regex=r'^[a-z]+$'),
+            _source='get')
+
+        @request_args(params=search)
+        def view(params):
+            return params
+
+        @request_args(item=collection('id', params=search))
+        def nested_view(item):
+            return item
+
+        with self.app.test_request_context(query_string={'q': 'flask', 'tag': 'web', 'id': '1'}):
+            expected = {'q': 'flask', 'page': 1, 'order': 'asc', 'tag': 'web'}
+            assert_equal(view(), expected)
+            assert_equal(nested_view(), {'id': '1', 'params': expected})
+
+        with self.app.test_request_context(query_string={'page': '0', 'order': 'up', 'tag': 'a1'}):
+            try:
+                view()
+            except ValidationError as e:
+                assert_equal(sorted(e.errors), ['order', 'page', 'q', 'tag'])
+            else:
+                raise AssertionError('ValidationError not raised')
+
+        self.app.add_url_rule('/search', 'search', view)
+        resp = self.app.test_client().get('/search', query_string={'page': '0'})
+        assert_equal(resp.status_code, 400)
+        assert_equal('page must be at least 1' in resp.get_data(True), True)
+
+        assert_raises(TypeError, Field, min=1)
+        assert_raises(TypeError, Field, max=100)
+        assert_raises(TypeError, Field, type=int, regex=r'^\d+$')
+        assert_raises(TypeError, Field, type=int, max_length=3)
+
+        @request_args(params=Schema(words=Field(type=str.split, regex=r'^[a-z]+$'), _source='get'))
+        def words_view(params):
+            return params
+
+        with self.app.test_request_context(query_string={'words': 'a b'}):
+            try:
+                words_view()
+            except ValidationError as e:
+                assert_equal(e.errors, {'words': 'is not a valid value'})
+            else:
+                raise AssertionError('ValidationError not raised')
+
     def test_fetch_cookies(self):
         @self.app.route('/set', methods=['POST'])
         @request_args(val=post())
@@ -143,6 +617,122 @@ class TestReqArg(object):
         resp = client.get('/get')
         assert_equal(resp.get_data(True), 'bar')
 
+    def test_fetch_json(self):
+        @request_args(x=json(), y=json('z', type=int), tags=json(getlist=True), _source='json')
+        def view(x, y, tags, w):
+            return 'x={0},y={1},tags={2},w={3}'.format(x, y, tags, w)
+
+        body = '{"x": "ijk", "z": "123", "tags": ["a", "b"], "skip": {"a": [1, "]}"]}, "w": null}'
+        for incremental in (False, True):
+            self.app.config['REQARG_INCREMENTAL_JSON'] = incremental
+            with self.app.test_request_context(
+                    method='POST', data=body, content_type='application/json'):
+                assert_equal(view(), "x=ijk,y=123,tags=['a', 'b'],w=None")
+
+            with self.app.test_request_context(method='POST', data={'x': 'ijk'}):
+                assert_equal(view(), 'x=None,y=None,tags=[],w=None')
+
+            with self.app.test_request_context(
+                    method='POST', data=b'{"x": "\xff"}', content_type='application/json'):
+                assert_equal(view(), 'x=None,y=None,tags=[],w=None')
+
+            with self.app.test_request_context(
+                    method='POST', data='{"x": 1, "z": 2, "x": 3}', content_type='application/json'):
+                assert_equal(view(), 'x=3,y=2,tags=[],w=None')
+
+    def test_fetch_binary_body(self):
+        @request_args(body=raw())
+        def view(body):
+            return body
+
+        @request_args(body=raw(max_bytes=4))
+        def small_view(body):
+            return body
+
+        with self.app.test_request_context(method='POST', data=b'\x00\x01\x02binary'):
+            body = view()
+            assert_equal((type(body), body.readonly, body.tobytes()), (memoryview, True, b'\x00\x01\x02binary'))
+            assert_equal(view() is body, True)
+            assert_raises(LimitExceeded, small_view)
+
+        try:
+            import msgpack as msgpack_module
+        except ImportError:
+            raise SkipTest('msgpack is not installed')
+
+        @request_args(x=msgpack(type=int), ids=msgpack(getlist=True), name=msgpack('n', default='?'))
+        def msgpack_view(x, ids, name):
+            return x, ids, name
+
+        payload = msgpack_module.packb({'x': '42', 'ids': [1, 2], 'n': 'flask'})
+        with self.app.test_request_context(method='POST', data=payload,
+                                           content_type='application/msgpack'):
+            assert_equal(msgpack_view(), (42, [1, 2], 'flask'))
+            assert_equal(msgpack_view(), (42, [1, 2], 'flask'))
+
+        with self.app.test_request_context(method='POST', data=b'\xc1'):
+            assert_equal(msgpack_view(), (None, [], '?'))
+
+    def test_scan_json_object(self):
+        text = '{"a": {"b": ["}", {"c": 1}]}, "d\\"": [1, 2.5e3, true], "e": "x", "f": null}'
+        assert_equal(scan_object(text, ['d"', 'f', 'g']), {'d"': [1, 2500.0, True], 'f': None})
+        assert_equal(scan_object(text, ['a']), {'a': {'b': ['}', {'c': 1}]}})
+        assert_raises(ValueError, scan_object, '[1, 2]', ['a'])
+        assert_equal(scan_object('{"x": 1, "y": 2, "x": 3}', ['x']), {'x': 3})
+
+    def test_fetch_registered_sources(self):
+        @self.app.route('/items/<int:item_id>')
+        @request_args(agent=fetch('headers', 'User-Agent'), item_id=fetch('view_args'),
+                      method=fetch('environ', 'REQUEST_METHOD'))
+        def view(item_id, agent, method):
+            return '{0},{1},{2}'.format(item_id, agent, method)
+
+        client = self.app.test_client()
+        resp = client.get('/items/42', headers={'User-Agent': 'test'})
+        assert_equal(resp.get_data(True), '42,test,GET')
+
+        def view_(x):
+            pass
+
+        assert_raises(TypeError, request_args(x=fetch('nowhere')), view_)
+        assert_raises(TypeError, request_args(_source='nowhere'), view_)
+
+    def test_order_sources_by_cost(self):
+        resolved = []
+
+        class Wrapper(_FlaskRequestWrapper):
+            def storage_dict(self, source):
+                if source not in self._storage_dicts:
+                    resolved.append(source)
+                return super(Wrapper, self).storage_dict(source)
+
+        Wrapper.register_source('expensive', lambda wrapper: wrapper.request.form, SOURCE_COST_BODY)
+        Wrapper.register_source('cheap', lambda wrapper: wrapper.request.args, SOURCE_COST_CHEAP)
+
+        @Wrapper.request_args(x=fetch('expensive'), y=fetch('cheap'), z=get())
+        def view(x, y, z):
+            return x, y, z
+
+        with self.app.test_request_context(method='POST', query_string={'y': '1'}):
+            assert_equal(view(), (None, '1', None))
+        assert_equal(resolved, ['cheap', 'get', 'expensive'])
+        assert_equal('expensive' in _FlaskRequestWrapper._source_registry, False)
+
+    def test_fetch_from_wsgi_environ(self):
+        @WSGIRequestWrapper.request_args(x=get(type=int), ids=get(getlist=True), y=cookies(),
+                                         z=cookies('q'), w=post())
+        def view(x, ids, y, z, w, v):
+            return x, ids, y, z, w, v
+
+        with self.app.test_request_context(
+                method='POST',
+                query_string='x=12&ids=1&caf%C3%A9=ignored&ids=%E2%9C%93+2&v=a%26b&ids',
+                headers={'Cookie': 'y=caf\xc3\xa9; q="a\\"b\\073c"'},
+                data={'w': 'pqr'}):
+            assert_equal(view(), (12, ['1', u'\u2713 2', ''], u'caf\xe9', 'a"b;c', 'pqr', 'a&b'))
+            assert_equal('args' in request.__dict__, False)
+            assert_equal('cookies' in request.__dict__, False)
+
     def test_fetch_collection(self):
         class Article(object):
             def __init__(self, title, text, author):
@@ -163,6 +753,11 @@ class TestReqArg(object):
             assert_equal(type(article), Article)
             return str(article)
 
+        @request_args(article=collection('title', 'author', text=post('content'), _storage='record'))
+        def view_record(article):
+            assert_equal(tuple(article), ('FooBar', 'Mary', 'foobarfoobar'))
+            return 'Title: {0.title}\n{0.text}\nby. {0.author}'.format(article)
+
         with self.app.test_request_context(
                 method='POST',
                 data={
@@ -172,4 +767,45 @@ class TestReqArg(object):
                 }):
             assert_equal(view(), 'Title: FooBar\nfoobarfoobar\nby. Mary')
             assert_equal(view_(), 'Title: FooBar\nfoobarfoobar\nby. Mary')
-
+            assert_equal(view_record(), 'Title: FooBar\nfoobarfoobar\nby. Mary')
+
+
+    def test_audit_views(self):
+        @self.app.route('/items', methods=['GET', 'POST'])
+        @request_args(ids=get(getlist=True, type=int), item=collection('a', b=post(type=int)))
+        def items(ids, item, q):
+            return ''
+
+        class ItemView(MethodView):
+            @request_args(_source='get')
+            def get(self, page):
+                return ''
+
+        self.app.add_url_rule('/items/<int:id>', view_func=ItemView.as_view('item'))
+        self.app.add_url_rule('/plain', 'plain', lambda: '')
+
+        @self.app.route('/upload', methods=['POST'])
+        @request_args(upload=files(stream=True))
+        def upload(upload):
+            return ''
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(reqarg, ['audit', '--replay', '--repeat', '2', '--json'])
+        assert_equal(result.exit_code, 0)
+
+        report = dict((entry['endpoint'], entry) for entry in json_module.loads(result.output))
+        assert_equal(sorted(report), ['item.get', 'items', 'upload'])
+        assert_equal(report['upload']['parses_body'], True)
+        assert_equal(report['items']['parses_body'], True)
+        assert_equal(report['items']['runs'], 2)
+        assert_equal(report['items']['arguments'], [
+            {'name': 'ids', 'key': 'ids', 'source': 'get', 'type': 'int', 'getlist': True},
+            {'name': 'item', 'source': 'collection', 'children': [
+                {'name': 'a', 'key': 'a', 'source': 'args', 'type': None, 'getlist': False},
+                {'name': 'b', 'key': 'b', 'source': 'post', 'type': 'int', 'getlist': False}]},
+            {'name': 'q', 'key': 'q', 'source': 'args', 'type': None, 'getlist': False}])
+        assert_equal(report['item.get']['parses_body'], False)
+        assert_equal('runs' in report['item.get'], False)
+
+        result = runner.invoke(reqarg, ['audit'])
+        assert_equal(result.output.splitlines()[0], '/items [GET, POST] -> items (parses body)')